@@ -0,0 +1,255 @@
+"""The Adaptive module holds scans which decide where to measure
+while the scan is running.  Rather than measuring every point on a
+fixed grid, an adaptive scan fits the points measured so far and
+chooses the next position from the grid which will most improve the
+parameters that the user cares about.  The scan stops as soon as those
+parameters are known to the requested precision.
+
+"""
+from __future__ import absolute_import, print_function
+from collections import OrderedDict
+import numpy as np
+from .Fit import ExactFit
+from .Monoid import MonoidList
+from .Scans import SimpleScan, cached
+from .Plan import ScanPlan
+
+
+class AdaptivePlan(ScanPlan):
+    """An AdaptivePlan is a ScanPlan whose table holds the candidate
+    positions of the scan, rather than the order in which they are
+    measured.  The order is only decided while the plan is iterated,
+    so the plan must be given the results of the scan through the
+    watch method before it is run.
+
+    Parameters
+    ----------
+    names : list of str
+      The name of the scanned axis
+    actions : list of Motion
+      The motion for the scanned axis
+    positions : numpy structured array
+      The candidate positions
+    fit : Fit
+      The model fitted to the measured points
+    target : dict
+      The largest acceptable standard error of each named fit parameter
+    initial : list of int
+      The rows of the table to measure before the first fit
+    limit : int
+      The largest number of points to measure
+    offset : int
+      The number of points which have already been measured
+
+    """
+    #: Each point is chosen from the ones before, so it cannot be
+    #: chosen while the previous point is still being recorded
+    pipelines = False
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, names, actions, positions, fit, target,
+                 initial, limit, offset=0):
+        ScanPlan.__init__(self, names, actions, positions, offset=offset)
+        self.fit = fit
+        self.target = target
+        self.initial = initial
+        self.limit = limit
+        self._xs = []
+        self._ys = []
+
+    def __len__(self):
+        return max(self.limit - self.offset, 0)
+
+    def __repr__(self):
+        return "AdaptivePlan({}, {} candidates)".format(self.names,
+                                                        len(self.positions))
+
+    def watch(self, xs, ys):
+        self._xs = xs
+        self._ys = ys
+
+    def skip(self, count):
+        return AdaptivePlan(self.names, self.actions, self.positions,
+                            self.fit, self.target, self.initial, self.limit,
+                            offset=self.offset + count)
+
+    def __iter__(self):
+        name = self.names[0]
+        action = self.actions[0]
+        candidates = self.positions[name]
+        for measured in range(self.offset, self.limit):
+            if measured < len(self.initial):
+                choice = self.initial[measured]
+            else:
+                choice = self.choose()
+                if choice is None:
+                    return
+            action(candidates[choice])
+            yield OrderedDict([(name, action())])
+
+    def move_times(self, start=None, velocity=None):
+        """Estimate the time spent moving to each point of the plan.  The
+        order of the points is not known in advance, so the moves are
+        taken from a sweep through the candidates in order."""
+        times = ScanPlan.move_times(self, start, velocity)
+        return np.resize(times, len(self))
+
+    def _data(self):
+        """Get the measured positions, values, and uncertainties.  Only
+        the first channel of a multi-channel detector is used."""
+        size = min(len(self._xs), len(self._ys))
+        xs = np.array(self._xs[:size], dtype=np.float64)
+        if not size:
+            return xs, np.zeros(0), np.zeros(0)
+        values = np.asarray(self._ys.values(), dtype=np.float64)
+        errs = np.asarray(self._ys.err(), dtype=np.float64)
+        if isinstance(self._ys[0], MonoidList):
+            values, errs = values[0], errs[0]
+        return xs, values[:size], errs[:size]
+
+    def _ratios(self, covariance, indices):
+        """The variance of each target parameter over its target."""
+        variance = np.diag(covariance)
+        return [variance[indices[key]] / self.target[key]**2
+                for key in self.target]
+
+    def _score(self, covariance, indices):
+        """Measure how far the covariance is from meeting the target."""
+        return sum(self._ratios(covariance, indices))
+
+    def _met(self, covariance, indices):
+        """Whether every target parameter is known well enough."""
+        return all(ratio <= 1 for ratio in self._ratios(covariance, indices))
+
+    def choose(self):
+        """Pick the row of the table to measure next.
+
+        Returns
+        -------
+        The index of the candidate position which most reduces the
+        uncertainty on the target parameters, or None if the targets
+        have already been met.
+
+        """
+        xs, values, errs = self._data()
+        if not len(xs):
+            return None
+        candidates = self.positions[self.names[0]]
+        try:
+            params = self.fit.fit(xs, values)
+            covariance = self.fit.covariance(xs, params, errs)
+        except (RuntimeError, np.linalg.LinAlgError, ValueError):
+            covariance = None
+        if covariance is None or not np.all(np.isfinite(covariance)):
+            # Without a fit, fill in the largest gap in the data
+            gaps = np.min(np.abs(candidates[:, np.newaxis] - xs), axis=1)
+            return int(np.argmax(gaps))
+
+        indices = self.fit.readable(np.arange(len(params)))
+        if self._met(covariance, indices):
+            return None
+        # A new point is assumed to be as noisy as a typical old one
+        noise = np.median(errs[np.isfinite(errs) & (errs > 0)])
+        scores = []
+        for position in candidates:
+            try:
+                trial = self.fit.covariance(np.append(xs, position), params,
+                                            np.append(errs, noise))
+                scores.append(self._score(trial, indices))
+            except (np.linalg.LinAlgError, ValueError):
+                scores.append(np.inf)
+        return int(np.argmin(scores))
+
+
+class AdaptiveScan(SimpleScan):
+    """AdaptiveScan is a scan along a single axis which only measures as
+    many points as it needs to determine the parameters of a fit.  It
+    cannot be pipelined, since each point is chosen from the results
+    of the points before it.
+
+    Parameters
+    ----------
+    action : Motion
+      The axis to scan
+    values : Array of Float
+      The candidate positions for the scan
+    defaults : Defaults
+      The defaults for the instrument
+    fit : Fit
+      The model which is fitted to the measured points
+    target : dict
+      The largest acceptable standard error of each named fit parameter
+      e.g. {"center": 0.01}
+    initial : list of int
+      The indices of the candidate positions which are measured before
+      the first fit.  By default, enough evenly spaced points are taken
+      to perform the fit.
+    max_points : int
+      The most points to measure before giving up on the target.  By
+      default, this is the number of candidates.
+
+    Raises
+    ------
+    TypeError
+      If the fit has no smooth model to judge the target
+    ValueError
+      If the target names a parameter which the fit does not have
+
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, action, values, defaults, fit, target,
+                 initial=None, max_points=None):
+        if isinstance(fit, ExactFit):
+            raise TypeError("An adaptive scan needs a model to fit, "
+                            "not {}".format(fit))
+        if not fit.smooth:
+            raise TypeError(
+                "{} has no smooth gradient, so the precision of its "
+                "parameters cannot be estimated.".format(type(fit).__name__))
+        fit.check_names(target)
+        SimpleScan.__init__(self, action, values, defaults)
+        self.fit_model = fit
+        self.target = target
+        if initial is None:
+            count = min(fit.degree + 1, len(self.values))
+            initial = np.unique(np.linspace(0, len(self.values) - 1,
+                                            count).astype(int)).tolist()
+        self.initial = initial
+        if max_points is None:
+            max_points = len(self.values)
+        self.max_points = max_points
+
+    def map(self, func):
+        """The map function returns a modified scan that performs the given
+        function on all of the original positions to return the new positions.
+
+        """
+        return AdaptiveScan(self.action,
+                            [func(x) for x in self.values],
+                            self.defaults, self.fit_model, self.target,
+                            self.initial, self.max_points)
+
+    @property
+    def reverse(self):
+        """Create a new scan that runs in the opposite direction"""
+        last = len(self.values) - 1
+        return AdaptiveScan(self.action, self.values[::-1], self.defaults,
+                            self.fit_model, self.target,
+                            [last - i for i in self.initial],
+                            self.max_points)
+
+    def compile(self):
+        plan = SimpleScan.compile(self)
+        return AdaptivePlan(plan.names, plan.actions, plan.positions,
+                            self.fit_model, self.target, self.initial,
+                            self.max_points)
+
+    @cached
+    def __len__(self):
+        return self.max_points
+
+    @cached
+    def __repr__(self):
+        return "AdaptiveScan({}, {}, {})".format(self.action.title.upper(),
+                                                 repr(self.values),
+                                                 repr(self.target))
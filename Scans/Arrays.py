@@ -0,0 +1,442 @@
+"""
+Monoids which keep their counts in numpy arrays.  A
+PolarisationSpectrum finds the polarisation of every bin of a
+spectrum at once and a MonoidArray holds the measurements of a whole
+scan, so that neither has to loop over a Python object for each value.
+"""
+from collections import OrderedDict
+import numpy as np
+from .Monoid import (Average, ColumnarMonoid, MonoidList, MonoidPlotting,
+                     Polarisation, _nested)
+
+
+def bin_weights(bins, size):
+    """
+    Build a matrix which sums a spectrum into groups of bins.
+
+    Parameters
+    ----------
+    bins : list
+      The bins in each group, as a slice or an array of indices
+    size : int
+      The number of bins in the spectrum
+
+    Returns
+    -------
+    An array with a row for each group, such that the dot product with
+    a spectrum gives the total of each group.
+    """
+    weights = np.zeros((len(bins), size))
+    for row, group in enumerate(bins):
+        weights[row, group] = 1
+    return weights
+
+
+class PolarisationSpectrum(MonoidList, ColumnarMonoid):
+    """
+    This monoid calculates the polarisation in every time of flight
+    bin, or group of bins, of a pair of spectra at once.  It behaves as
+    a MonoidList of Polarisation values, one for each group, but keeps
+    the counts in numpy arrays.
+
+    Parameters
+    ----------
+    ups : Array of Float
+      The counts in each bin with the flipper in the up state
+    downs : Array of Float
+      The counts in each bin with the flipper in the down state
+    up_monitor : Float or Array of Float
+      The monitor counts for the up spectrum, either as a total or
+      for each bin.  By default, the counts are not normalised.
+    down_monitor : Float or Array of Float
+      The monitor counts for the down spectrum
+    bins : list or Array
+      The groups of bins to sum together, either as a list of slices
+      and index arrays or as a matrix from bin_weights.  By default,
+      each bin is its own group.
+
+    A MonoidArray of spectra keeps an array of the counts in every
+    group of every point, so the whole scan is combined and calculated
+    at once.  The values of the array have a row for each group, like
+    the channels of a MonoidList.
+    """
+    __slots__ = ("ups", "up_monitor", "downs", "down_monitor")
+
+    # pylint: disable=too-many-arguments, super-init-not-called
+    def __init__(self, ups, downs, up_monitor=1.0, down_monitor=1.0,
+                 bins=None):
+        ups = np.asarray(ups, dtype=np.float64)
+        downs = np.asarray(downs, dtype=np.float64)
+        up_monitor = np.asarray(up_monitor, dtype=np.float64)
+        down_monitor = np.asarray(down_monitor, dtype=np.float64)
+        if bins is not None:
+            if not isinstance(bins, np.ndarray):
+                bins = bin_weights(bins, ups.shape[-1])
+            ups = np.dot(bins, ups)
+            downs = np.dot(bins, downs)
+            if up_monitor.ndim:
+                up_monitor = np.dot(bins, up_monitor)
+            if down_monitor.ndim:
+                down_monitor = np.dot(bins, down_monitor)
+        self.ups = ups
+        self.downs = downs
+        self.up_monitor = up_monitor * np.ones_like(ups)
+        self.down_monitor = down_monitor * np.ones_like(downs)
+
+    def _columns(self):
+        return OrderedDict([("ups.total", self.ups),
+                            ("ups.count", self.up_monitor),
+                            ("downs.total", self.downs),
+                            ("downs.count", self.down_monitor)])
+
+    def fields(self):
+        return self._columns()
+
+    @staticmethod
+    def from_components(components):
+        return PolarisationSpectrum(components["ups.total"],
+                                    components["downs.total"],
+                                    components["ups.count"],
+                                    components["downs.count"])
+
+    @staticmethod
+    def array_values(columns):
+        return Polarisation.array_values(columns).T
+
+    @staticmethod
+    def array_err(columns):
+        return Polarisation.array_err(columns).T
+
+    @property
+    def values(self):
+        """The Polarisation of each group"""
+        return [Polarisation(Average(up, count=up_count),
+                             Average(down, count=down_count))
+                for up, up_count, down, down_count
+                in zip(self.ups, self.up_monitor,
+                       self.downs, self.down_monitor)]
+
+    def polarisation(self):
+        """The polarisation of each group, as an array"""
+        return Polarisation.array_values(self._columns())
+
+    @classmethod
+    def zero(cls):  # pylint: disable=arguments-differ
+        # Like Monoid.zero, this is called on the class, since a
+        # spectrum of any length can start from zero.
+        return cls(0.0, 0.0, 0.0, 0.0)
+
+    def __add__(self, y):
+        if y in (0, 0.0):
+            y = self.zero()
+        return PolarisationSpectrum(self.ups + y.ups,
+                                    self.downs + y.downs,
+                                    self.up_monitor + y.up_monitor,
+                                    self.down_monitor + y.down_monitor)
+
+    def __iadd__(self, y):
+        if not isinstance(y, PolarisationSpectrum):
+            return self + y
+        self.ups = self.ups + y.ups
+        self.downs = self.downs + y.downs
+        self.up_monitor = self.up_monitor + y.up_monitor
+        self.down_monitor = self.down_monitor + y.down_monitor
+        return self
+
+    def __len__(self):
+        return self.ups.size
+
+    def __repr__(self):
+        return "PolarisationSpectrum({} bins)".format(len(self))
+
+    def err(self):
+        return Polarisation.array_err(self._columns())
+
+    def components(self):
+        result = OrderedDict()
+        columns = self._columns()
+        for index in range(len(self)):
+            for name in ("ups.total", "ups.count",
+                         "downs.total", "downs.count"):
+                result["{}.{}".format(index, name)] = \
+                    float(columns[name][index])
+        return result
+
+
+class MonoidArray(MonoidPlotting):
+    """
+    A list of monoids of a single type which keeps the components of
+    the monoids in numpy arrays, rather than as separate objects.
+    Accumulating into an element updates the arrays in place and the
+    values and uncertainties of the whole list are calculated at once.
+
+    The type of the monoids is set by the first element.  A list of
+    MonoidList elements keeps a MonoidArray for each channel, unless
+    the list is itself columnar, as a PolarisationSpectrum is.  Monoids
+    which are not columnar are kept as objects, so that any monoid can
+    still be stored.
+    """
+    def __init__(self, values=()):
+        self.kind = None
+        self._size = 0
+        self._columns = None
+        self._channels = None
+        self._objects = None
+        self.extend(values)
+
+    def __len__(self):
+        return self._size
+
+    def _start(self, value):
+        """Choose how to store the elements from the first value"""
+        self.kind = type(value)
+        if value.columnar:
+            self._columns = OrderedDict(
+                (name, np.zeros((16,) + np.shape(field)))
+                for name, field in value.fields().items())
+        elif isinstance(value, MonoidList):
+            self._channels = [MonoidArray() for _ in value]
+        else:
+            self._objects = []
+
+    def _check(self, value):
+        if not isinstance(value, self.kind):
+            raise TypeError(
+                "Cannot store {} in a MonoidArray of {}".format(
+                    repr(value), self.kind.__name__))
+
+    def _components(self, value):
+        """Get the fields of a value, ensuring that they match the
+        columns of the array"""
+        components = value.fields()
+        if list(components) != list(self._columns) or any(
+                np.shape(field) != column.shape[1:]
+                for field, column in zip(components.values(),
+                                         self._columns.values())):
+            raise TypeError(
+                "Cannot store {} in a MonoidArray with columns {}".format(
+                    repr(value), ", ".join(self._columns)))
+        return components
+
+    def _index(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("MonoidArray index out of range")
+        return index
+
+    def _view(self):
+        """The filled part of each column"""
+        return OrderedDict((name, column[:self._size])
+                           for name, column in self._columns.items())
+
+    def append(self, value):
+        """Add a new monoid to the end of the list"""
+        if self.kind is None:
+            self._start(value)
+        self._check(value)
+        if self._channels is not None:
+            for channel, part in zip(self._channels, value):
+                channel.append(part)
+        elif self._columns is not None:
+            capacity = len(next(iter(self._columns.values())))
+            if self._size == capacity:
+                for name, column in self._columns.items():
+                    grown = np.zeros((2 * capacity,) + column.shape[1:])
+                    grown[:capacity] = column
+                    self._columns[name] = grown
+            for name, component in self._components(value).items():
+                self._columns[name][self._size] = component
+        else:
+            self._objects.append(value)
+        self._size += 1
+
+    def extend(self, values):
+        """Add many monoids to the end of the list"""
+        for value in values:
+            self.append(value)
+
+    def accumulate(self, index, value):
+        """
+        Combine a monoid into an element of the list in place.  This
+        is the same as ``array[index] += value``, without building a
+        new monoid.
+        """
+        index = self._index(index)
+        if value in (0, 0.0):
+            return
+        self._check(value)
+        if self._channels is not None:
+            for channel, part in zip(self._channels, value):
+                channel.accumulate(index, part)
+        elif self._columns is not None:
+            row = {name: column[index]
+                   for name, column in self._columns.items()}
+            merged = self.kind.array_add(row, self._components(value))
+            for name, component in merged.items():
+                self._columns[name][index] = component
+        else:
+            self._objects[index] += value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        index = self._index(index)
+        if self._channels is not None:
+            return MonoidList([channel[index] for channel in self._channels])
+        if self._columns is not None:
+            return self.kind.from_components(
+                {name: column[index]
+                 for name, column in self._columns.items()})
+        return self._objects[index]
+
+    def __setitem__(self, index, value):
+        index = self._index(index)
+        self._check(value)
+        if self._channels is not None:
+            for channel, part in zip(self._channels, value):
+                channel[index] = part
+        elif self._columns is not None:
+            for name, component in self._components(value).items():
+                self._columns[name][index] = component
+        else:
+            self._objects[index] = value
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self[index]
+
+    def __add__(self, other):
+        if len(self) != len(other):
+            raise ValueError(
+                "Cannot add MonoidArrays of length {} and {}".format(
+                    len(self), len(other)))
+        result = MonoidArray()
+        if not self._size:
+            return result
+        if isinstance(other, MonoidArray) and other.kind is self.kind:
+            result.kind = self.kind
+            result._size = self._size
+            if self._channels is not None:
+                result._channels = [
+                    mine + theirs
+                    for mine, theirs in zip(self._channels, other._channels)]
+                return result
+            if self._columns is not None:
+                result._columns = self.kind.array_add(self._view(),
+                                                      other._view())
+                return result
+        result.extend([a + b for a, b in zip(self, other)])
+        return result
+
+    @property
+    def channels(self):
+        """
+        The class of monoid in each channel, if the elements are
+        MonoidLists, or None otherwise.
+        """
+        if self._channels is not None:
+            return [channel.kind for channel in self._channels]
+        if self._size and issubclass(self.kind, MonoidList):
+            return [type(part) for part in self[0]]
+        return None
+
+    def columns(self):
+        """
+        Get the components of every element as an ordered dictionary of
+        arrays.  The names of the components of each channel of a
+        MonoidList are prefixed by the index of the channel, as in
+        MonoidList.components.
+        """
+        result = OrderedDict()
+        if self._channels is not None:
+            for index, channel in enumerate(self._channels):
+                for name, column in channel.columns().items():
+                    result["{}.{}".format(index, name)] = column
+        elif self._columns is not None and self.channels is not None:
+            # Split the columns of a columnar MonoidList by channel
+            view = self._view()
+            for index in range(len(self.channels)):
+                for name, column in view.items():
+                    result["{}.{}".format(index, name)] = \
+                        column[:, index].copy()
+        elif self._columns is not None:
+            for name, column in self._view().items():
+                result[name] = column.copy()
+        elif self._objects:
+            for name in self._objects[0].components():
+                result[name] = np.array([x.components()[name]
+                                         for x in self._objects])
+        return result
+
+    @staticmethod
+    def from_columns(kind, columns, channels=None):
+        """
+        Build a MonoidArray from a dictionary of component arrays, as
+        given by the columns method.
+
+        Parameters
+        ----------
+        kind : type
+          The class of monoid held in the array
+        columns : dict
+          The array of each component
+        channels : list of type
+          The class of monoid in each channel, if kind is a MonoidList
+        """
+        # pylint: disable=protected-access
+        result = MonoidArray()
+        if not columns:
+            return result
+        result.kind = kind
+        result._size = len(next(iter(columns.values())))
+        if channels is not None and kind.columnar:
+            # Stack the channels of a columnar MonoidList by bin
+            parts = [_nested(columns, str(index))
+                     for index in range(len(channels))]
+            result._columns = OrderedDict(
+                (name, np.array([part[name] for part in parts],
+                                dtype=np.float64).T)
+                for name in parts[0])
+        elif channels is not None:
+            result._channels = [
+                MonoidArray.from_columns(channel,
+                                         _nested(columns, str(index)))
+                for index, channel in enumerate(channels)]
+        elif kind.columnar:
+            result._columns = OrderedDict(
+                (name, np.array(column, dtype=np.float64))
+                for name, column in columns.items())
+        else:
+            raise TypeError(
+                "Cannot build a MonoidArray of {} from its components".format(
+                    kind.__name__))
+        return result
+
+    def __repr__(self):
+        return "MonoidArray([{}])".format(
+            ", ".join([repr(x) for x in self]))
+
+    def values(self):
+        """
+        Get the numerical values from the List
+        """
+        if self.kind is None:
+            return np.array([])
+        if self._channels is not None:
+            return np.array([channel.values() for channel in self._channels])
+        if self._columns is not None:
+            return self.kind.array_values(self._view())
+        return np.array([float(y) for y in self._objects])
+
+    def err(self):
+        """
+        Get the uncertainty values from the List
+        """
+        if self.kind is None:
+            return np.array([])
+        if self._channels is not None:
+            return np.array([channel.err() for channel in self._channels])
+        if self._columns is not None:
+            return self.kind.array_err(self._view())
+        return np.array([y.err() for y in self._objects])
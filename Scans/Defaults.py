@@ -18,6 +18,14 @@ from six import add_metaclass
 class Defaults(object):
     """A defaults object to store the correct functions for this instrument"""
 
+    #: The largest difference between two readback positions which
+    #: should still be treated as the same point in a scan.  This
+    #: should be larger than the positional noise on the motors, which
+    #: is typically a few thousandths of a unit, but smaller than the
+    #: steps of a scan.  Instruments with finer or coarser motors
+    #: should override it.
+    tolerance = 0.01
+
     @staticmethod
     @abstractmethod
     def detector(**kwargs):
@@ -27,12 +35,11 @@ class Defaults(object):
         as keyword arguments.
 
         """
-        pass
 
     @staticmethod
     @abstractmethod
     def log_file():
         """
         Returns the name of a unique log file where the scan data can be saved.
+        The log is written as an NPZ file by Scans.Log.ScanLog.
         """
-        pass
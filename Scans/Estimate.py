@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""The Estimate module holds fits which estimate a peak or an edge
+directly from the data, without an optimizer.  They are drawn with
+the same models as the Gaussian and Erf fits.
+
+"""
+from abc import ABCMeta, abstractmethod
+import numpy as np
+from six import add_metaclass
+from .Fit import Fit, Gaussian, Erf
+from .Optimize import log_parabola, moments, half_maximum, steepest
+
+
+@add_metaclass(ABCMeta)
+class PeakEstimate(Fit):
+    """
+    A base class for estimating a single peak directly from the data.
+    The estimates take a single pass through the data without any
+    optimizer, so they are fast and never fail to converge, but they
+    are less accurate than a full fit.  The peak is drawn as the
+    gaussian with the estimated parameters.
+    """
+
+    def __init__(self, title):
+        Fit.__init__(self, 4, title)
+
+    @abstractmethod
+    def fit(self, x, y):  # pragma: no cover
+        pass
+
+    def get_y(self, x, fit):
+        return Gaussian.get_y(x, fit)
+
+    def readable(self, fit):
+        return {"center": fit[0], "sigma": fit[1],
+                "amplitude": fit[2], "background": fit[3]}
+
+    def title(self, params):
+        # pylint: disable=arguments-differ
+        params = self.readable(params)
+        return (self._title + ": center {center:.3g}, " +
+                "sigma {sigma:.3g}").format(**params)
+
+
+class CaruanaFit(PeakEstimate):
+    """
+    Estimate a gaussian peak by fitting a parabola to the logarithm of
+    the data, as described by Caruana.
+    """
+
+    def __init__(self):
+        PeakEstimate.__init__(self, "Caruana Estimate")
+
+    def fit(self, x, y):
+        return log_parabola(x, y)
+
+
+class CentroidFit(PeakEstimate):
+    """
+    Estimate a peak from the weighted centroid and spread of the
+    signal above the background.  This makes no assumption about the
+    shape of the peak.
+    """
+
+    def __init__(self):
+        PeakEstimate.__init__(self, "Centroid")
+
+    def fit(self, x, y):
+        return moments(x, y)
+
+
+class FWHMFit(PeakEstimate):
+    """
+    Estimate a peak from the points where it crosses half of its
+    maximum height.  The sigma is that of a gaussian with the same
+    full width at half maximum, which is also given as the fwhm.
+    """
+
+    def __init__(self):
+        PeakEstimate.__init__(self, "FWHM")
+
+    def fit(self, x, y):
+        return half_maximum(x, y)
+
+    def readable(self, fit):
+        result = PeakEstimate.readable(self, fit)
+        result["fwhm"] = 2 * np.sqrt(2 * np.log(2)) * fit[1]
+        return result
+
+
+class EdgeFit(Fit):
+    """
+    Estimate the position of an edge from the steepest slope of the
+    data.  The edge is drawn as the error function with the same
+    steepest slope and range, so the parameters match those of Erf.
+    """
+
+    def __init__(self):
+        Fit.__init__(self, 4, "Edge Estimate")
+
+    def fit(self, x, y):
+        return steepest(x, y)
+
+    def get_y(self, x, fit):
+        return Erf.get_y(x, fit)
+
+    def readable(self, fit):
+        return {"center": fit[0], "stretch": fit[1],
+                "scale": fit[2], "background": fit[3]}
+
+    def title(self, params):
+        # pylint: disable=arguments-differ
+        return "Edge at {:.3g}".format(params[0])
+
+
+#: Closed form estimates of a peak or an edge
+Caruana = CaruanaFit()
+
+Centroid = CentroidFit()
+
+FWHM = FWHMFit()
+
+Edge = EdgeFit()
+
+__all__ = ["Caruana", "Centroid", "FWHM", "Edge"]
@@ -5,38 +5,38 @@ fits (i.e. Linear and Gaussian).
 
 """
 from abc import ABCMeta, abstractmethod
-from sys import platform
-import ctypes
-import os
+from multiprocessing import Pool, cpu_count
 import numpy as np
 from six import add_metaclass
-from scipy.special import erf  # pylint: disable=no-name-in-module
+from .Optimize import (erf, curve_fit, jacobian_columns, design_covariance,
+                       levenberg_marquardt, log_parabola, steepest)
 
-if platform == "win32":
-    def handler(_):
-        """Basic handler for KeyboardInterrupt
 
-    This handler bypasses the Intel handler and prevents Python from
-    completely crashing on a Ctrl+C
+# The pools are kept between resamplings, since starting one takes far
+# longer than the fits themselves
+_POOLS = {}
+
+
+def _pool(processes):
+    """Get a pool with the given number of worker processes, starting
+    it on first use"""
+    if processes not in _POOLS:
+        _POOLS[processes] = Pool(processes)
+    return _POOLS[processes]
 
-        """
-        try:
-            import _thread
-        except ImportError:
-            import thread as _thread
-        _thread.interrupt_main()
-        return 1
 
-    BASEPATH = r"C:\Instrument\Apps\Python\Lib\site-packages\numpy\core"
-    ctypes.CDLL(os.path.join(BASEPATH, "libmmd.dll"))
-    ctypes.CDLL(os.path.join(BASEPATH, "libifcoremd.dll"))
-    routine = ctypes.WINFUNCTYPE(ctypes.c_int, ctypes.c_uint)(handler)
-    ctypes.windll.kernel32.SetConsoleCtrlHandler(routine, 1)
+def close_pools():
+    """Stop the worker processes which are kept for resampling"""
+    while _POOLS:
+        _, pool = _POOLS.popitem()
+        pool.close()
+        pool.join()
 
-else:
-    os.environ['FOR_DISABLE_CONSOLE_CTRL_HANDLER'] = "T"
-# pylint: disable=wrong-import-position
-from scipy.optimize import curve_fit, OptimizeWarning  # noqa: E402
+
+def _refit(task):
+    """Fit a batch of resampled data in a worker process"""
+    fit, x, ys, starts = task
+    return fit.fit_many(x, ys, starts)
 
 
 @add_metaclass(ABCMeta)
@@ -47,6 +47,15 @@ class Fit(object):
     extract usable information from those parameters.
     """
 
+    #: While live fitting, a refit is skipped when the mean squared
+    #: residual of the last fit on the new data has changed by less
+    #: than this fraction.
+    refit_tolerance = 1e-3
+
+    #: Whether the model changes smoothly with its parameters, so that
+    #: their uncertainty can be estimated from its gradient
+    smooth = True
+
     def __init__(self, degree, title):
         self.degree = degree
         self._title = title
@@ -77,6 +86,288 @@ class Fit(object):
         """
         return lambda i: {}
 
+    def check_names(self, names):
+        """
+        Make sure that every name is one of the parameters given by
+        readable.
+
+        Parameters
+        ----------
+        names : iterable of str
+          The names to check, such as the keys of a target precision
+
+        Raises
+        ------
+        ValueError
+          If any name is not a parameter of the fit
+        """
+        known = self.readable(np.zeros(self.degree))
+        unknown = sorted(set(names) - set(known))
+        if unknown:
+            raise ValueError(
+                "{} has no parameter named {}.  The parameters are "
+                "{}.".format(self._title, ", ".join(unknown),
+                             ", ".join(sorted(known))))
+
+    def refine(self, x, y, params):
+        """
+        Fit the data, starting from the parameters of an earlier fit.
+        Models which can be warm started should override this; by
+        default, the data is fitted from scratch.
+
+        Parameters
+        ----------
+        x : Array of Float
+          The independent variables
+        y : Array of Float
+          The dependent variables
+        params
+          The parameters of an earlier fit to similar data
+
+        Returns
+        -------
+        The new fit parameters
+        """
+        # pylint: disable=unused-argument
+        return self.fit(x, y)
+
+    def fit_many(self, x, ys, starts=None):
+        """
+        Fit several sets of dependent variables measured at the same
+        positions, such as the channels of a detector.  Models which
+        can fit every set at once should override this; by default,
+        each set is fitted in turn.
+
+        Parameters
+        ----------
+        x : Array of Float
+          The independent variables
+        ys : 2D Array of Float
+          The dependent variables, with a row for each set
+        starts : list
+          The parameters of an earlier fit to each set, or None to fit
+          that set from scratch.
+
+        Returns
+        -------
+        A list with the parameters of each fit, or None where the fit
+        failed.
+        """
+        if starts is None:
+            starts = [None] * len(ys)
+        results = []
+        for y, start in zip(ys, starts):
+            try:
+                if start is None:
+                    results.append(self.fit(x, y))
+                else:
+                    results.append(self.refine(x, y, start))
+            except RuntimeError:
+                results.append(None)
+        return results
+
+    def objective(self, x, y, params):
+        """
+        Measure how well a set of parameters describes the data
+
+        Returns
+        -------
+        The mean squared residual
+        """
+        residual = np.asarray(y, dtype=np.float64) - self.get_y(x, params)
+        return np.mean(residual**2)
+
+    def covariance(self, x, params, err):
+        """
+        Estimate the covariance matrix of the fitted parameters.
+
+        The estimate only depends on how sensitive the model is to
+        each parameter at the measured positions, so it can also be
+        used to predict the uncertainty after measuring a new point.
+
+        Parameters
+        ----------
+        x : Array of Float
+          The measured positions
+        params : Array of Float
+          The fitted parameters
+        err : Array of Float
+          The uncertainty on the value measured at each position
+
+        Returns
+        -------
+        A square array with the covariance of the parameters.  Every
+        element is infinite if the measurements do not constrain all
+        of the parameters.
+
+        """
+        x = np.asarray(x, dtype=np.float64)
+        err = np.asarray(err, dtype=np.float64)
+        valid = np.isfinite(err) & (err > 0)
+        jacobian = self.jacobian(x[valid], params)
+        weighted = jacobian / err[valid][:, np.newaxis]
+        return design_covariance(weighted)
+
+    def uncertainty(self, x, y, params):
+        """
+        Estimate the standard error on each fitted parameter, weighting
+        every point by the uncertainty of its measurement.
+
+        Parameters
+        ----------
+        x : Array of Float
+          The measured positions
+        y : MonoidArray
+          The measured values
+        params
+          The fitted parameters, or a list of parameters with one for
+          each channel of the detector
+
+        Returns
+        -------
+        A dictionary with the standard error of each named parameter.
+        For a detector with several channels, this is a list with the
+        errors of each channel.  The errors are None where there are
+        too few measurements to estimate them.
+        """
+        err = np.asarray(y.err(), dtype=np.float64)
+        if len(err.shape) == 1:
+            return self._uncertainty(x, err, params)
+        return [self._uncertainty(x, channel, fit)
+                for channel, fit in zip(err, params)]
+
+    def _uncertainty(self, x, err, params):
+        """Estimate the standard errors of a single channel"""
+        valid = np.isfinite(err) & (err > 0)
+        if params is None or np.sum(valid) <= self.degree:
+            return None
+        variance = np.diag(self.covariance(x, params, err))
+        return self.readable(np.sqrt(variance))
+
+    def resample(self, x, y, params, samples=100, processes=None,
+                 seed=None):
+        """
+        Refit Monte-Carlo copies of the data.  Each copy adds random
+        noise to every measurement, drawn from a normal distribution
+        with the uncertainty of that measurement.  The copies are
+        split between a pool of processes and each process fits its
+        share in a single batch, starting from the original fit.  The
+        pool is kept for the next resampling, so only the first call
+        waits for the processes to start.
+
+        Parameters
+        ----------
+        x : Array of Float
+          The measured positions
+        y : MonoidArray
+          The measured values
+        params
+          The fitted parameters, or a list of parameters with one for
+          each channel of the detector
+        samples : int
+          The number of copies to fit
+        processes : int
+          The number of processes to fit in.  This defaults to the
+          number of cores.  With a single process, the copies are
+          fitted without starting a pool.
+        seed : int
+          The seed for the random noise
+
+        Returns
+        -------
+        An array with the parameters fitted to each copy, with a row
+        for each copy.  For a detector with several channels, the
+        second axis is the channel.  Fits which failed are NaN.  If
+        there is no fit to start from in any channel, this is None.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        values = np.asarray(y.values(), dtype=np.float64)
+        err = np.asarray(y.err(), dtype=np.float64)
+        err = np.where(np.isfinite(err) & (err > 0), err, 0)
+        channels = values.shape[:-1]
+        if not channels:
+            params = [params]
+        fitted = [fit for fit in params if fit is not None]
+        if not fitted:
+            return None
+        size = len(fitted[0])
+        noise = np.random.RandomState(seed).randn(samples, *values.shape)
+        ys = (values + err * noise).reshape(-1, values.shape[-1])
+        starts = list(params) * samples
+
+        if processes is None:
+            processes = cpu_count()
+        processes = max(1, min(processes, samples))
+        bounds = np.linspace(0, len(ys), processes + 1).astype(int)
+        tasks = [(self, x, ys[low:high], starts[low:high])
+                 for low, high in zip(bounds[:-1], bounds[1:])]
+        if processes == 1:
+            fits = [_refit(task) for task in tasks]
+        else:
+            fits = _pool(processes).map(_refit, tasks)
+
+        result = np.full((len(ys), size), np.nan)
+        for idx, fit in enumerate(fit for batch in fits for fit in batch):
+            if fit is not None:
+                result[idx] = fit
+        return result.reshape((samples,) + channels + (size,))
+
+    def intervals(self, fits, level=0.95):
+        """
+        Find the confidence interval on each parameter from the fits
+        to resampled data.
+
+        Parameters
+        ----------
+        fits : 2D Array of Float
+          The parameters fitted to each copy of the data, as made by
+          resample for a single channel
+        level : float
+          The fraction of the fits which should fall within the
+          interval
+
+        Returns
+        -------
+        A dictionary with the lower and upper bounds on each named
+        parameter, or None if none of the fits succeeded.
+        """
+        fits = [self.readable(fit) for fit in fits
+                if np.all(np.isfinite(fit))]
+        if not fits:
+            return None
+        tail = 50 * (1 - level)
+        return {key: tuple(np.percentile([fit[key] for fit in fits],
+                                         [tail, 100 - tail]))
+                for key in fits[0]}
+
+    def jacobian(self, x, params):
+        """
+        Find the derivatives of the model with respect to each parameter.
+        By default, these are estimated by finite differences.
+
+        Parameters
+        ----------
+        x : Array of Float
+          The positions at which to take the derivatives
+        params : Array of Float
+          The parameters of the model
+
+        Returns
+        -------
+        An array with a row for each position and a column for each
+        parameter
+        """
+        x = np.asarray(x, dtype=np.float64)
+        params = np.asarray(params, dtype=np.float64)
+        base = self.get_y(x, params)
+        jacobian = np.empty((len(x), len(params)))
+        for idx, value in enumerate(params):
+            step = 1e-6 * max(abs(value), 1.0)
+            shifted = params.copy()
+            shifted[idx] += step
+            jacobian[:, idx] = (self.get_y(x, shifted) - base) / step
+        return jacobian
+
     def title(self, params):
         """
         Give the title of the fit.
@@ -98,6 +389,55 @@ class Fit(object):
         -------
         A function to call in the plotting loop
         """
+        # The last fit of each channel, and how well it fitted its data
+        previous = {}
+        objectives = {}
+        plot_grid = []
+
+        def grid(x):
+            """Reuse the plotting grid while the range of x is unchanged"""
+            bounds = (np.min(x), np.max(x))
+            if not plot_grid or plot_grid[0] != bounds:
+                plot_grid[:] = [bounds, np.linspace(bounds[0], bounds[1],
+                                                    1000)]
+            return plot_grid[1]
+
+        def stale(channel, x, y):
+            """Check whether a channel needs to be refitted.  The fit is
+            skipped when the new data is described as well as before."""
+            if channel not in previous:
+                return True
+            last = objectives[channel]
+            current = self.objective(x, y, previous[channel])
+            return not abs(current - last) <= self.refit_tolerance * last
+
+        def remember(channel, x, y, params):
+            """Keep a fit to start the next one from"""
+            previous[channel] = params
+            objectives[channel] = self.objective(x, y, params)
+            return params
+
+        def update(x, y):
+            """Fit a single channel, starting from its previous fit."""
+            if not stale(None, x, y):
+                return previous[None]
+            if None in previous:
+                return remember(None, x, y, self.refine(x, y, previous[None]))
+            return remember(None, x, y, self.fit(x, y))
+
+        def update_channels(x, values):
+            """Refit every channel which needs it in a single batch"""
+            params = [previous.get(channel) for channel in range(len(values))]
+            channels = [channel for channel, value in enumerate(values)
+                        if stale(channel, x, value)]
+            fits = self.fit_many(x, values[channels],
+                                 [params[channel] for channel in channels])
+            for channel, fit in zip(channels, fits):
+                params[channel] = fit
+                if fit is not None:
+                    remember(channel, x, values[channel], fit)
+            return params
+
         def action(x, y, fig):
             """Fit and plot the data within the plotting loop
 
@@ -107,8 +447,8 @@ class Fit(object):
               The x positions measured thus far
             y : Array of Float
               The y positions measured thus far
-            fig : matplotlib.figure.Figure
-              The figure on which to plot
+            fig : Scans.multiplot.NBPlot
+              The plot on which to draw the fitted curve
 
             Returns
             -------
@@ -119,27 +459,25 @@ class Fit(object):
             """
             if len(x) < self.degree:
                 return None
-            plot_x = np.linspace(np.min(x), np.max(x), 1000)
+            x = np.asarray(x, dtype=np.float64)
+            plot_x = grid(x)
             values = np.array(y.values())
             if len(values.shape) > 1:
-                params = []
-                for value in values:
-                    try:
-                        params.append(self.fit(x, value))
-                    except RuntimeError:
-                        params.append(None)
+                params = update_channels(x, values)
+                for channel, fit in enumerate(params):
+                    if fit is None:
                         continue
-                    fity = self.get_y(plot_x, params[-1])
-                    fig.plot(plot_x, fity, "-",
-                             label="{} fit".format(self.title(params[-1])))
+                    fity = self.get_y(plot_x, fit)
+                    fig.curve("fit {}".format(channel), plot_x, fity, "-",
+                              label="{} fit".format(self.title(fit)))
             else:
                 try:
-                    params = self.fit(x, values)
+                    params = update(x, values)
                 except RuntimeError:
                     return None
                 fity = self.get_y(plot_x, params)
-                fig.plot(plot_x, fity, "-",
-                         label="{} fit".format(self.title(params)))
+                fig.curve("fit", plot_x, fity, "-",
+                          label="{} fit".format(self.title(params)))
             fig.legend()
             return params
         return action
@@ -159,6 +497,13 @@ class PolyFit(Fit):
     def fit(self, x, y):
         return np.polyfit(x, y, self.degree - 1)
 
+    def fit_many(self, x, ys, starts=None):
+        # pylint: disable=unused-argument
+        ys = np.asarray(ys, dtype=np.float64)
+        if not len(ys):
+            return []
+        return list(np.polyfit(x, ys.T, self.degree - 1).T)
+
     def get_y(self, x, fit):
         return np.polyval(fit, x)
 
@@ -221,6 +566,9 @@ class PeakFit(Fit):
     Will use all of the points within 5 mm of the peak when fitting
     the quadratic.
 
+    The fit parameters are the position of the peak followed by the
+    coefficients of the quadratic.
+
     """
 
     def __init__(self, window=None):
@@ -229,35 +577,72 @@ class PeakFit(Fit):
                 "PeakFit you to pass it requires a ± window size over which to"
                 " fit the quadratic.  For example, PeakFit(5)")
         self._window = window
-        self._fit = np.zeros(3)
         Fit.__init__(self, 3, "Peak")
 
     def _make_window(self, x, center):
         return np.abs(x-center) < self._window
 
+    @staticmethod
+    def _params(quadratic):
+        """Put the peak of a quadratic in front of its coefficients"""
+        return np.concatenate([[-quadratic[1]/2/quadratic[0]], quadratic])
+
     def fit(self, x, y):
         x = np.array(x)
         y = np.array(y)
         base = np.nanargmax(y)
         window = self._make_window(x, x[base])
-        fit = np.polyfit(x[window], y[window], 2)
-        self._fit = fit
-        return np.array([-fit[1]/2/fit[0]])
+        return self._params(np.polyfit(x[window], y[window], 2))
+
+    def fit_many(self, x, ys, starts=None):
+        # pylint: disable=unused-argument
+        x = np.asarray(x, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if not len(ys):
+            return []
+        # Every set has its own window, so solve the weighted normal
+        # equations of all of the quadratics together
+        peaks = x[np.nanargmax(ys, axis=1)]
+        windows = self._make_window(x[np.newaxis, :], peaks[:, np.newaxis])
+        design = np.vander(x, 3)
+        normal = np.einsum("cn,ni,nj->cij", windows, design, design)
+        target = np.einsum("ni,cn->ci", design, np.where(windows, ys, 0))
+        try:
+            quadratics = np.linalg.solve(normal, target[:, :, np.newaxis])
+        except np.linalg.LinAlgError:
+            quadratics = np.matmul(np.linalg.pinv(normal),
+                                   target[:, :, np.newaxis])
+        return [self._params(quadratic) for quadratic in quadratics[:, :, 0]]
 
     def get_y(self, x, fit):
         center = fit[0]
         y = x * 0
         if max(x) >= center >= min(x):
             window = self._make_window(x, center)
-            y[window] = np.polyval(self._fit, x[window])
+            y[window] = np.polyval(fit[1:], x[window])
         return y
 
     def readable(self, fit):
         return {"peak": fit[0]}
 
-    def title(self, center):
+    def covariance(self, x, params, err):
+        x = np.asarray(x, dtype=np.float64)
+        err = np.asarray(err, dtype=np.float64)
+        valid = np.isfinite(err) & (err > 0)
+        window = self._make_window(x, params[0]) & valid
+        design = np.vander(x[window], 3) / err[window][:, np.newaxis]
+        quadratic = design_covariance(design)
+        if not np.all(np.isfinite(quadratic)):
+            return np.array([[np.inf]])
+        # The peak is at -b/2a, so propagate the uncertainty on the
+        # quadratic coefficients through its gradient.
+        fit = params[1:]
+        gradient = np.array([fit[1] / 2 / fit[0]**2, -1 / 2.0 / fit[0], 0])
+        return np.array([[np.dot(gradient, np.dot(quadratic, gradient))]])
+
+    def title(self, params):
         # pylint: disable=arguments-differ
-        return "Peak at {}".format(center)
+        return "Peak at {:.3g}".format(params[0])
 
 
 @add_metaclass(ABCMeta)
@@ -266,16 +651,34 @@ class CurveFit(Fit):
     A class for fitting models based on the scipy curve_fit optimizer
     """
 
+    #: Whether a live fit starts from the parameters of the previous fit
+    warm_start = True
+
     def __init__(self, degree, title):
         Fit.__init__(self, degree, title)
 
+    @staticmethod
+    # pylint: disable=unused-argument
+    def _jacobian(xs, *args):  # pragma: no cover
+        """
+        The derivative of the model with respect to each parameter,
+        taking the same arguments as the model.  Subclasses which do
+        not override it have their derivatives estimated by finite
+        differences instead, so this is never called.
+        """
+        return None
+
+    @property
+    def _analytic(self):
+        """Whether the subclass gives the derivatives of its model"""
+        return type(self)._jacobian is not CurveFit._jacobian
+
     @staticmethod
     @abstractmethod
     def _model(xs, *args):  # pragma: no cover
         """
         This is the mathematical model to be fit by the subclass
         """
-        pass
 
     @staticmethod
     @abstractmethod
@@ -284,10 +687,54 @@ class CurveFit(Fit):
         Given a set of x and y values, make a guess as to the initial
         parameters of the fit.
         """
-        pass
+
+    def _curve_fit(self, x, y, start):
+        """Optimise the model from the starting parameters"""
+        if not self._analytic:
+            return curve_fit(self._model, x, y, start)[0]
+        # curve_fit halves its budget of model evaluations when given
+        # a jacobian, so restore the budget used by finite differences
+        return curve_fit(self._model, x, y, start, jac=self._jacobian,
+                         maxfev=200 * (len(start) + 1))[0]
 
     def fit(self, x, y):
-        return curve_fit(self._model, x, y, self.guess(x, y))[0]
+        return self._curve_fit(x, y, self.guess(x, y))
+
+    def refine(self, x, y, params):
+        if not self.warm_start:
+            return self.fit(x, y)
+        try:
+            return self._curve_fit(x, y, params)
+        except RuntimeError:
+            return self.fit(x, y)
+
+    def fit_many(self, x, ys, starts=None):
+        if not self._analytic or not len(ys):
+            return Fit.fit_many(self, x, ys, starts)
+        x = np.asarray(x, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if starts is None or not self.warm_start:
+            starts = [None] * len(ys)
+        params = [self.guess(x, y) if start is None else start
+                  for y, start in zip(ys, starts)]
+        params, converged = levenberg_marquardt(
+            self._model, self._jacobian, x, ys, params,
+            200 * (len(params[0]) + 1))
+        results = [fit if done else None
+                   for fit, done in zip(params, converged)]
+        # Fall back to curve_fit for any set which failed in the batch
+        failed = [idx for idx, fit in enumerate(results) if fit is None]
+        retries = Fit.fit_many(self, x, ys[failed],
+                               [starts[idx] for idx in failed])
+        for idx, fit in zip(failed, retries):
+            results[idx] = fit
+        return results
+
+    def jacobian(self, x, params):
+        if not self._analytic:
+            return Fit.jacobian(self, x, params)
+        x = np.asarray(x, dtype=np.float64)
+        return self._jacobian(x, *params)
 
     def get_y(self, x, fit):
         return self._model(x, *fit)
@@ -300,8 +747,6 @@ class GaussianFit(CurveFit):
 
     def __init__(self):
         CurveFit.__init__(self, 4, "Gaussian Fit")
-        import warnings
-        warnings.simplefilter("ignore", OptimizeWarning)
 
     @staticmethod
     # pylint: disable=arguments-differ
@@ -315,10 +760,26 @@ class GaussianFit(CurveFit):
         return background + amplitude * np.exp(-((xs - cen) / sigma /
                                                  np.sqrt(2)) ** 2)
 
+    @staticmethod
+    # pylint: disable=arguments-differ, unused-argument
+    def _jacobian(xs, cen, sigma, amplitude, background):
+        """
+        The derivatives of the gaussian with respect to each parameter
+        """
+        offset = (xs - cen) / sigma
+        peak = np.exp(-offset ** 2 / 2)
+        return jacobian_columns(amplitude * peak * offset / sigma,
+                                amplitude * peak * offset ** 2 / sigma,
+                                peak,
+                                1.0)
+
     @staticmethod
     def guess(x, y):
-        return [np.mean(x), np.max(x)-np.min(x),
-                np.max(y) - np.min(y), np.min(y)]
+        try:
+            return log_parabola(x, y)
+        except (RuntimeError, np.linalg.LinAlgError):
+            return [np.mean(x), np.max(x)-np.min(x),
+                    np.max(y) - np.min(y), np.min(y)]
 
     def readable(self, fit):
         return {"center": fit[0], "sigma": fit[1],
@@ -360,6 +821,22 @@ class DampedOscillatorFit(CurveFit):
         """
         return amp * np.cos((x-center)*freq)*np.exp(-((x-center)/width)**2)
 
+    @staticmethod
+    def _jacobian(x, center, amp, freq, width):
+        """
+        The derivatives of the damped oscillator with respect to each
+        parameter
+        """
+        offset = x - center
+        cos = np.cos(offset * freq)
+        sin = np.sin(offset * freq)
+        damping = np.exp(-(offset / width)**2)
+        return jacobian_columns(
+            amp * damping * (freq * sin + 2 * offset * cos / width**2),
+            cos * damping,
+            -amp * offset * sin * damping,
+            2 * amp * cos * damping * offset**2 / width**3)
+
     @staticmethod
     def guess(x, y):
         peak = x[np.argmax(y)]
@@ -393,8 +870,6 @@ class ErfFit(CurveFit):
 
     def __init__(self):
         CurveFit.__init__(self, 4, "Erf Fit")
-        import warnings
-        warnings.simplefilter("ignore", OptimizeWarning)
 
     @staticmethod
     # pylint: disable=arguments-differ
@@ -406,13 +881,29 @@ class ErfFit(CurveFit):
         """
         return background + scale * erf(stretch*(xs-cen))
 
+    @staticmethod
+    # pylint: disable=arguments-differ, unused-argument
+    def _jacobian(xs, cen, stretch, scale, background):
+        """
+        The derivatives of the error function with respect to each
+        parameter
+        """
+        slope = 2 / np.sqrt(np.pi) * np.exp(-(stretch * (xs - cen))**2)
+        return jacobian_columns(-scale * stretch * slope,
+                                scale * (xs - cen) * slope,
+                                erf(stretch * (xs - cen)),
+                                1.0)
+
     @staticmethod
     def guess(x, y):
-        return [
-            np.mean(x),  # center
-            (max(x)-min(x))/2,  # stretch
-            (max(y)-min(y))/2,  # scale
-            min(y)]  # background
+        try:
+            return steepest(x, y)
+        except RuntimeError:
+            return [
+                np.mean(x),  # center
+                (max(x)-min(x))/2,  # stretch
+                (max(y)-min(y))/2,  # scale
+                min(y)]  # background
 
     def readable(self, fit):
         return {"center": fit[0], "stretch": fit[1],
@@ -432,10 +923,13 @@ class TopHatFit(CurveFit):
     >>> scan(TRANSLATION, start=-20, stop=20, step=1).Fit(Erf, uamps=1)
     """
 
+    # The edges of the hat have no gradient, so the optimizer cannot
+    # move them far from where they start
+    warm_start = False
+    smooth = False
+
     def __init__(self):
         CurveFit.__init__(self, 5, "Top Hat Fit")
-        import warnings
-        warnings.simplefilter("ignore", OptimizeWarning)
 
     @staticmethod
     # pylint: disable=arguments-differ
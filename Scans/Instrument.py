@@ -36,7 +36,7 @@ class MockInstrument(Defaults):
 
     def log_file(self):
         self.scan_count += 1
-        return "mock_scan_{:02}.dat".format(self.scan_count)
+        return "mock_scan_{:02}.npz".format(self.scan_count)
 
 
 populate()
@@ -21,7 +21,8 @@ except ImportError:
     from .Mocks import lm
 from .Defaults import Defaults
 from .Detector import dae_periods
-from .Monoid import Polarisation, Average, MonoidList
+from .Monoid import Average, MonoidList
+from .Arrays import PolarisationSpectrum
 from .Util import make_scan
 
 
@@ -57,7 +58,7 @@ class Larmor(Defaults):
     def log_file():
         from datetime import datetime
         now = datetime.now()
-        return "larmor_scan_{}_{}_{}_{}_{}_{}.dat".format(
+        return "larmor_scan_{}_{}_{}_{}_{}_{}.npz".format(
             now.year, now.month, now.day, now.hour, now.minute, now.second)
 
     def __repr__(self):
@@ -108,21 +109,19 @@ def pol_measure(**kwargs):
     g.waitfor(frames=gfrm+kwargs["frames"])
     g.pause()
 
-    pols = [Polarisation.zero() for _ in slices]
+    pols = PolarisationSpectrum.zero()
     for channel in [11, 12]:
         mon1 = g.get_spectrum(1, i+1)
         spec1 = g.get_spectrum(channel, i+1)
         mon2 = g.get_spectrum(1, i+2)
         spec2 = g.get_spectrum(channel, i+2)
-        for idx, slc in enumerate(slices):
-            ups = Average(
-                np.sum(spec1["signal"][slc])*100.0,
-                np.sum(mon1["signal"])*100.0)
-            down = Average(
-                np.sum(spec2["signal"][slc])*100.0,
-                np.sum(mon2["signal"])*100.0)
-            pols[idx] += Polarisation(ups, down)
-    return MonoidList(pols)
+        pols += PolarisationSpectrum(
+            np.asarray(spec1["signal"])*100.0,
+            np.asarray(spec2["signal"])*100.0,
+            np.sum(mon1["signal"])*100.0,
+            np.sum(mon2["signal"])*100.0,
+            bins=slices)
+    return pols
 
 
 @dae_periods()
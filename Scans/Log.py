@@ -0,0 +1,194 @@
+"""The Log module records the measurements taken during a scan.
+
+Rather than writing a line of text for every point, the log keeps a
+buffer of the measured points and periodically appends it to an NPZ
+file as a chunk of typed columns.  Each point records the time of the
+measurement, the position of every axis, and the raw components of the
+measured monoid, so that no information is lost and the log can be read
+back without any parsing.
+"""
+from collections import OrderedDict
+from io import BytesIO
+from time import time
+import os
+import pickle
+import zipfile
+import numpy as np
+from .Monoid import Monoid
+
+
+def _columns(position, value):
+    """Flatten a measured point into a dictionary of named floats"""
+    row = OrderedDict()
+    row["time"] = time()
+    for name in position:
+        row[name] = float(position[name])
+    if isinstance(value, Monoid):
+        for name, component in value.components().items():
+            row["value." + name] = component
+    else:
+        row["value"] = float(value)
+    return row
+
+
+class ScanLog(object):
+    """An append-only log of the points measured in a scan.
+
+    Parameters
+    ----------
+    path : str
+      The file in which to save the log.  Any existing file is replaced.
+    chunk : int
+      The number of points to buffer before writing them to the file
+    interval : float
+      The longest time, in seconds, that a point may wait in the buffer
+      before being written to the file
+    start : int
+      The number of points of the scan plan which were measured before
+      this log was started.  This is non-zero for a resumed scan.
+    plan : dict
+      The fingerprint of the scan plan, which is saved in the
+      checkpoint so that it can only be resumed by the same scan.
+
+    Whenever the buffer is written, the log also saves a checkpoint
+    holding the number of points measured and the ``state`` attribute,
+    which the scan sets to its accumulated results.  The checkpoint
+    is removed once the scan finishes without an error.
+
+    """
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+    def __init__(self, path, chunk=16, interval=10.0, start=0, plan=None):
+        self.path = path
+        self.chunk = chunk
+        self.interval = interval
+        self.points = start
+        self.plan = plan
+        self.state = None
+        self._rows = []
+        self._chunks = 0
+        self._flushed = time()
+
+    def __enter__(self):
+        zipfile.ZipFile(self.path, "w").close()
+        self._flushed = time()
+        return self
+
+    def __exit__(self, typ, value, traceback):
+        self.flush()
+        path = checkpoint_path(self.path)
+        if typ is not None:
+            self._checkpoint()
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, position, value):
+        """Record a single measurement
+
+        Parameters
+        ----------
+        position : dict
+          The position of each axis at the measurement
+        value : Monoid
+          The measured value
+
+        """
+        self._rows.append(_columns(position, value))
+        self.points += 1
+        if len(self._rows) >= self.chunk or \
+           time() - self._flushed >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Write all of the buffered points to the file"""
+        self._flushed = time()
+        if not self._rows:
+            return
+        names = []
+        for row in self._rows:
+            for name in row:
+                if name not in names:
+                    names.append(name)
+        with zipfile.ZipFile(self.path, "a") as archive:
+            for name in names:
+                column = np.array([row.get(name, np.nan)
+                                   for row in self._rows],
+                                  dtype=np.float64)
+                buf = BytesIO()
+                np.lib.format.write_array(buf, column)
+                archive.writestr(
+                    "{:06d}/{}.npy".format(self._chunks, name),
+                    buf.getvalue())
+        self._chunks += 1
+        self._rows = []
+        self._checkpoint()
+
+    def _checkpoint(self):
+        """Save the progress of the scan, so that it can be resumed"""
+        if self.state is None:
+            return
+        path = checkpoint_path(self.path)
+        temp = path + ".tmp"
+        with open(temp, "wb") as outfile:
+            pickle.dump({"point": self.points, "state": self.state,
+                         "plan": self.plan},
+                        outfile, protocol=2)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp, path)
+
+
+def checkpoint_path(path):
+    """Find the checkpoint file which belongs to a log file"""
+    return path + ".checkpoint"
+
+
+def load_checkpoint(path):
+    """Load the progress of an interrupted scan
+
+    Parameters
+    ----------
+    path : str
+      The log file of the interrupted scan
+
+    Returns
+    -------
+    A dictionary with the number of points of the scan plan which were
+    measured under ``point``, the accumulated results of the scan
+    under ``state``, and the fingerprint of the scan plan under
+    ``plan``.
+
+    """
+    with open(checkpoint_path(path), "rb") as infile:
+        return pickle.load(infile)
+
+
+def read_log(path):
+    """Read a scan log back into memory
+
+    Parameters
+    ----------
+    path : str
+      The log file written by a ScanLog
+
+    Returns
+    -------
+    An ordered dictionary with an array for each column of the log.
+    Points where a column was not recorded are NaN.
+
+    """
+    with np.load(path) as archive:
+        chunks = OrderedDict()
+        for key in archive.files:
+            chunk, name = key.split("/", 1)
+            chunks.setdefault(chunk, OrderedDict())[name] = archive[key]
+    names = []
+    for columns in chunks.values():
+        for name in columns:
+            if name not in names:
+                names.append(name)
+    result = OrderedDict()
+    for name in names:
+        result[name] = np.concatenate(
+            [columns.get(name, np.full(len(columns["time"]), np.nan))
+             for columns in chunks.values()])
+    return result
@@ -7,10 +7,16 @@ Sum(b) = Sum(a+b) and Sum(a) + Sum(0) = Sum(a).
 
 Putting the incoming data into amonoid makes it easier to get the
 information out of a combined measuremnts.
+
+Adding with ``+`` always creates a new monoid, but ``+=`` updates the
+monoid on the left in place when both sides have the same type.  A
+monoid which is used as a running total should therefore not be
+shared with anything else.
 """
 
 from abc import ABCMeta, abstractmethod
-from matplotlib.pyplot import rcParams
+from collections import OrderedDict
+from itertools import cycle
 import numpy as np
 from six import add_metaclass
 
@@ -21,6 +27,8 @@ class Monoid(object):
     The Monoid base class enforces the two laws: There must be a zero
     operation and a combining function (add).
     """
+    __slots__ = ()
+
     @staticmethod
     @abstractmethod
     def zero():
@@ -29,14 +37,12 @@ class Monoid(object):
 
         x + x.zero() == x
         """
-        pass
 
     @abstractmethod
     def err(self):
         """
         Return the uncertainty of the current value
         """
-        pass
 
     @abstractmethod
     def __add__(self, x):
@@ -57,11 +63,124 @@ class Monoid(object):
             return self.pure(x)
         return x
 
+    def components(self):
+        """
+        Return the raw numbers that make up the monoid as an ordered
+        dictionary of floats.  Nested monoids are flattened, with
+        their names joined by dots.
+        """
+        result = OrderedDict()
+        result["value"] = float(self)
+        return result
+
+    #: Whether the monoid can be stored in a MonoidArray
+    columnar = False
 
-class Average(Monoid):
+    @staticmethod
+    def array_add(columns, other):
+        """
+        Combine many monoids at once, given dictionaries of arrays with
+        one array for each component.  Most monoids are combined by
+        adding their components together.
+        """
+        return OrderedDict((name, column + other[name])
+                           for name, column in columns.items())
+
+
+class ColumnarMonoid(Monoid):
+    """
+    A monoid which can be stored in a MonoidArray, as a numpy array
+    for each of its components.
+    """
+    __slots__ = ()
+
+    columnar = True
+
+    def fields(self):
+        """
+        Return the components of the monoid as they are stored in a
+        MonoidArray.  A monoid which covers many bins may give an array
+        for each component, rather than a float.
+        """
+        return self.components()
+
+    @staticmethod
+    @abstractmethod
+    def from_components(components):
+        """
+        Rebuild a monoid from the dictionary given by its fields
+        method.
+        """
+
+    @staticmethod
+    @abstractmethod
+    def array_values(columns):
+        """
+        Find the values of many monoids at once from a dictionary of
+        arrays, with one array for each component.
+        """
+
+    @staticmethod
+    @abstractmethod
+    def array_err(columns):
+        """
+        Find the uncertainties of many monoids at once from a
+        dictionary of arrays, with one array for each component.
+        """
+
+
+def _flatten(result, prefix, value):
+    """Add the components of a value to a dictionary under a prefix"""
+    if isinstance(value, Monoid):
+        for name, component in value.components().items():
+            result[prefix + "." + name] = component
+    else:
+        result[prefix] = float(value)
+    return result
+
+
+def _nested(components, prefix):
+    """Take the components of a nested monoid out of a dictionary"""
+    start = prefix + "."
+    return {name[len(start):]: value
+            for name, value in components.items()
+            if name.startswith(start)}
+
+
+def _count(components, prefix):
+    """Rebuild the counts stored under a prefix in the components of a
+    Polarisation.  The counts may have been an Average, a Sum, or a
+    plain number."""
+    nested = _nested(components, prefix)
+    if "count" in nested:
+        return Average.from_components(nested)
+    if "total" in nested:
+        return Sum.from_components(nested)
+    return components[prefix]
+
+
+def _counts(columns, prefix):
+    """Find the values and uncertainties of the counts stored under a
+    prefix in a dictionary of arrays.  The counts may have been an
+    Average, a Sum, or a plain number."""
+    if prefix + ".count" in columns:
+        total = columns[prefix + ".total"]
+        count = columns[prefix + ".count"]
+        columns = {"total": total, "count": count}
+        return Average.array_values(columns), Average.array_err(columns)
+    if prefix + ".total" in columns:
+        total = columns[prefix + ".total"]
+    else:
+        total = columns[prefix]
+    return total, np.sqrt(total)
+
+
+class Average(ColumnarMonoid):
     """
     This monoid calculates the average of its values.
     """
+    __slots__ = ("total", "count")
+
     def __init__(self, x, count=1):
         self.total = x
         self.count = count
@@ -77,6 +196,13 @@ class Average(Monoid):
             self.total + y.total,
             self.count + y.count)
 
+    def __iadd__(self, y):
+        if not isinstance(y, Average):
+            return self + y
+        self.total = self.total + y.total
+        self.count = self.count + y.count
+        return self
+
     @staticmethod
     def zero():
         return Average(0, 0)
@@ -94,11 +220,36 @@ class Average(Monoid):
     def __repr__(self):
         return "Average({}, count={})".format(self.total, self.count)
 
+    def components(self):
+        result = OrderedDict()
+        result["total"] = float(self.total)
+        result["count"] = float(self.count)
+        return result
 
-class Sum(Monoid):
+    @staticmethod
+    def from_components(components):
+        return Average(components["total"], count=components["count"])
+
+    @staticmethod
+    def array_values(columns):
+        count = columns["count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count == 0, np.nan, columns["total"] / count)
+
+    @staticmethod
+    def array_err(columns):
+        count = columns["count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count == 0, np.nan,
+                            np.sqrt(columns["total"]) / count)
+
+
+class Sum(ColumnarMonoid):
     """
     This monoid calculates the sum total of the values presented
     """
+    __slots__ = ("total",)
+
     def __init__(self, x):
         self.total = x
 
@@ -109,6 +260,12 @@ class Sum(Monoid):
         y = self.upgrade(y)
         return Sum(self.total + y.total)
 
+    def __iadd__(self, y):
+        if not isinstance(y, Sum):
+            return self + y
+        self.total = self.total + y.total
+        return self
+
     @staticmethod
     def zero():
         return Sum(0)
@@ -122,52 +279,244 @@ class Sum(Monoid):
     def __repr__(self):
         return "Sum({})".format(self.total)
 
+    def components(self):
+        result = OrderedDict()
+        result["total"] = float(self.total)
+        return result
+
+    @staticmethod
+    def from_components(components):
+        return Sum(components["total"])
+
+    @staticmethod
+    def array_values(columns):
+        return np.array(columns["total"], dtype=np.float64)
+
+    @staticmethod
+    def array_err(columns):
+        return np.sqrt(columns["total"])
+
+
+class WeightedMean(ColumnarMonoid):
+    """
+    This monoid calculates the inverse variance weighted mean of its
+    values.  Each value is weighted by one over the square of its
+    uncertainty, so a precise measurement counts for more than a
+    noisy one, whatever the count time or normalisation of each.
+
+    Parameters
+    ----------
+    x : float
+      The measured value
+    err : float
+      The uncertainty on the value.  By default, or when the
+      uncertainty is zero or unknown, this is the Poisson error
+      sqrt(x), with no less than a single count, so that an empty
+      measurement does not get an infinite weight.
+    """
+    __slots__ = ("total", "weight")
+
+    def __init__(self, x, err=None):
+        if err is None or not err > 0:
+            err = np.sqrt(max(abs(x), 1.0))
+        self.weight = 1.0 / err**2
+        self.total = x * self.weight
+
+    def pure(self, x):
+        """Turn a number or another monoid into a WeightedMean, using the
+        monoid's own uncertainty"""
+        if isinstance(x, MonoidList):
+            raise TypeError(
+                "A WeightedMean holds a single value, so it cannot "
+                "combine the channels of {}.  Leave out combine for "
+                "detectors with several channels.".format(repr(x)))
+        if isinstance(x, Monoid):
+            value = float(x)
+            if np.isnan(value):
+                return self.zero()
+            return WeightedMean(value, x.err())
+        return WeightedMean(x)
+
+    def __float__(self):
+        if self.weight == 0:
+            return float(np.nan)
+        return float(self.total / self.weight)
+
+    def __add__(self, y):
+        y = self.upgrade(y)
+        result = WeightedMean.zero()
+        result.total = self.total + y.total
+        result.weight = self.weight + y.weight
+        return result
+
+    def __iadd__(self, y):
+        if not isinstance(y, WeightedMean):
+            return self + y
+        self.total = self.total + y.total
+        self.weight = self.weight + y.weight
+        return self
+
+    @staticmethod
+    def zero():
+        return WeightedMean(0.0, np.inf)
+
+    def err(self):
+        if self.weight == 0:
+            return np.nan
+        return 1.0 / np.sqrt(self.weight)
+
+    def __str__(self):
+        return str(float(self))
+
+    def __repr__(self):
+        return "WeightedMean({}, err={})".format(float(self), self.err())
+
+    def components(self):
+        result = OrderedDict()
+        result["total"] = float(self.total)
+        result["weight"] = float(self.weight)
+        return result
+
+    @staticmethod
+    def from_components(components):
+        result = WeightedMean.zero()
+        result.total = components["total"]
+        result.weight = components["weight"]
+        return result
+
+    @staticmethod
+    def array_values(columns):
+        weight = columns["weight"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(weight == 0, np.nan, columns["total"] / weight)
+
+    @staticmethod
+    def array_err(columns):
+        weight = columns["weight"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(weight == 0, np.nan, 1.0 / np.sqrt(weight))
 
-class StdDev(Monoid):
+
+class StdDev(ColumnarMonoid):
     """
     This monoid calculates the standard deviation of values presented.
+
+    Rather than the sums of the values and their squares, which lose
+    precision when the spread is small compared to the mean, the
+    monoid keeps the count, the mean, and the sum of the squared
+    deviations from the mean.  Two partial results are combined
+    exactly with the pairwise update of Chan et al., so values can be
+    accumulated one at a time or in chunks in any order.
+
+    Parameters
+    ----------
+    x : float
+      The mean of the values
+    count : float
+      The number of values
+    m2 : float
+      The sum of the squared deviations of the values from their mean
     """
-    def __init__(self, x, count=1, avg=None):
-        if isinstance(x, Average):
-            self.squared = x
-            self.count = count
-            self.avg = avg
-        else:
-            self.squared = Average(x**2, count)
-            self.avg = Average(x, count)
-            self.count = count
+    __slots__ = ("mean", "count", "m2")
+
+    def __init__(self, x, count=1, m2=0.0):
+        self.mean = x
+        self.count = count
+        self.m2 = m2
 
     def __float__(self):
-        return np.sqrt(float(self.squared) - float(self.avg)**2)
+        if self.count == 0:
+            return float(np.nan)
+        return float(np.sqrt(self.m2 / self.count))
 
     def __add__(self, y):
-        return StdDev(
-            self.squared+y.squared,
-            count=self.count+y.count,
-            avg=self.avg+y.avg)
+        y = self.upgrade(y)
+        result = StdDev.zero()
+        result += self
+        result += y
+        return result
+
+    def __iadd__(self, y):
+        if not isinstance(y, StdDev):
+            return self + y
+        count = self.count + y.count
+        if count == 0:
+            return self
+        delta = y.mean - self.mean
+        weight = float(y.count) / count
+        self.m2 = self.m2 + y.m2 + delta**2 * self.count * weight
+        self.mean = self.mean + delta * weight
+        self.count = count
+        return self
 
     @staticmethod
     def zero():
-        return StdDev(Average.zero(), 0, Average.zero())
+        return StdDev(0.0, 0, 0.0)
 
     def err(self):
-        # I'm not really sure how to handle the uncertainty on a
-        # stnadard deviation right now.
-        raise NotImplementedError(
-            "Uncertainty on Standard deviation is not currently handled")
+        """
+        The standard error of the standard deviation, assuming that the
+        values are normally distributed.
+        """
+        if self.count < 2:
+            return np.nan
+        return float(self) / np.sqrt(2.0 * (self.count - 1))
 
     def __str__(self):
         return str(float(self))
 
     def __repr__(self):
-        return "StdDev({},{},{})".format(self.squared, self.count, self.avg)
+        return "StdDev({}, count={}, m2={})".format(self.mean, self.count,
+                                                    self.m2)
+
+    def components(self):
+        result = OrderedDict()
+        result["mean"] = float(self.mean)
+        result["count"] = float(self.count)
+        result["m2"] = float(self.m2)
+        return result
+
+    @staticmethod
+    def from_components(components):
+        return StdDev(components["mean"], count=components["count"],
+                      m2=components["m2"])
+
+    @staticmethod
+    def array_add(columns, other):
+        count = columns["count"] + other["count"]
+        delta = other["mean"] - columns["mean"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(count == 0, 0.0, other["count"] / count)
+        result = OrderedDict()
+        result["mean"] = columns["mean"] + delta * weight
+        result["count"] = count
+        result["m2"] = (columns["m2"] + other["m2"] +
+                        delta**2 * columns["count"] * weight)
+        return result
+
+    @staticmethod
+    def array_values(columns):
+        count = columns["count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count == 0, np.nan,
+                            np.sqrt(columns["m2"] / count))
+
+    @staticmethod
+    def array_err(columns):
+        count = columns["count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count < 2, np.nan,
+                            StdDev.array_values(columns) /
+                            np.sqrt(2.0 * (count - 1)))
 
 
-class Polarisation(Monoid):
+class Polarisation(ColumnarMonoid):
     """
     This monoid calculates the polarisation from the total of all of
     the up and down counts.
     """
+    __slots__ = ("ups", "downs")
+
     def __init__(self, ups, downs=0):
         self.ups = ups
         self.downs = downs
@@ -184,6 +533,16 @@ class Polarisation(Monoid):
             self.ups + y.ups,
             self.downs + y.downs)
 
+    def __iadd__(self, y):
+        if not isinstance(y, Polarisation):
+            return self + y
+        # The counts of a zero polarisation are plain numbers, which
+        # become new monoids here, so nested monoids are never shared
+        # with y.
+        self.ups += y.ups
+        self.downs += y.downs
+        return self
+
     def err(self):
         if float(self.ups) + float(self.downs) == 0:
             return 0.0
@@ -217,11 +576,48 @@ class Polarisation(Monoid):
     def __repr__(self):
         return "Polarisation({}, {})".format(self.ups, self.downs)
 
+    def components(self):
+        result = OrderedDict()
+        _flatten(result, "ups", self.ups)
+        _flatten(result, "downs", self.downs)
+        return result
+
+    @staticmethod
+    def from_components(components):
+        return Polarisation(_count(components, "ups"),
+                            _count(components, "downs"))
+
+    @staticmethod
+    def array_values(columns):
+        ups, _ = _counts(columns, "ups")
+        downs, _ = _counts(columns, "downs")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(ups + downs == 0, np.nan,
+                            (ups - downs) / (ups + downs))
+
+    @staticmethod
+    def array_err(columns):
+        ups, up_err = _counts(columns, "ups")
+        downs, down_err = _counts(columns, "downs")
+        total = ups + downs
+        spread = np.sqrt(down_err**2 + up_err**2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # As in err, the relative error of the denominator is
+            # ignored when the numerator is zero
+            result = np.where(
+                ups == downs,
+                spread / total,
+                (ups - downs) / total * spread *
+                np.sqrt((ups - downs)**-2.0 + total**-2.0))
+        return np.where(total == 0, 0.0, result)
+
 
 class MonoidList(Monoid):
     """
     This class turns a collection of Monoids into its own Monoid.
     """
+    __slots__ = ("values",)
+
     def __init__(self, values):
         self.values = values
 
@@ -233,6 +629,13 @@ class MonoidList(Monoid):
             y = self.zero()
         return MonoidList([a + b for a, b in zip(self.values, y)])
 
+    def __iadd__(self, y):
+        if y == 0:
+            return self
+        for index, value in enumerate(y):
+            self.values[index] += value
+        return self
+
     def __str__(self):
         return "[{}]".format(
             ", ".join([str(x) for x in self]))
@@ -248,6 +651,12 @@ class MonoidList(Monoid):
     def err(self):
         return [x.err() for x in self.values]
 
+    def components(self):
+        result = OrderedDict()
+        for index, value in enumerate(self.values):
+            _flatten(result, str(index), value)
+        return result
+
     def min(self):
         """Return the smallest value"""
         lowest = self.values[0]
@@ -265,33 +674,34 @@ class MonoidList(Monoid):
         return best
 
 
-class ListOfMonoids(list):
+@add_metaclass(ABCMeta)
+class MonoidPlotting(object):
     """
-    A modified list class with special helpers for handlings
-    lists of Monoids
+    Plotting helpers shared by the containers of monoids.  The
+    container must provide values and err.
     """
-    def __init__(self, *args):
-        list.__init__(self, *args)
+    @property
+    def color_cycle(self):
+        """The colours used to plot the channels of a detector"""
+        from matplotlib import rcParams
         try:
-            self.color_cycle = rcParams["axes.prop_cycle"].by_key()["color"]
+            return rcParams["axes.prop_cycle"].by_key()["color"]
         except KeyError:
-            self.color_cycle = ["k", "b", "g", "r"]
+            return ["k", "b", "g", "r"]
 
+    @abstractmethod
     def values(self):
         """
-        Get the numerical values from the List
+        Get the value of every element.  For elements with several
+        channels, there is a row for each channel.
         """
-        if isinstance(self[0], MonoidList):
-            return np.array([[float(v) for v in y] for y in self]).T
-        return [float(y) for y in self]
 
+    @abstractmethod
     def err(self):
         """
-        Get the uncertainty values from the List
+        Get the uncertainty of every element, in the same shape as the
+        values.
         """
-        if isinstance(self[0], MonoidList):
-            return np.array([[v for v in y.err()] for y in self]).T
-        return [y.err() for y in self]
 
     def plot(self, axis, xs):
         """
@@ -299,14 +709,34 @@ class ListOfMonoids(list):
         at a given set of x coordinates
         """
         markers = "osp+xv^<>"
-        if isinstance(self[0], MonoidList):
-            for y, err, color, marker in zip(self.values(), self.err(),
-                                             self.color_cycle, markers):
+        values = np.asarray(self.values())
+        if values.ndim > 1:
+            for y, err, color, marker in zip(values, self.err(),
+                                             cycle(self.color_cycle),
+                                             cycle(markers)):
                 axis.errorbar(xs, y, yerr=err, fmt="",
                               color=color, marker=marker,
                               linestyle="None")
         else:
-            axis.errorbar(xs, self.values(), yerr=self.err(), fmt="d")
+            axis.errorbar(xs, values, yerr=self.err(), fmt="d")
+
+    def plot_point(self, axis, xs, index):
+        """
+        Send a single new or changed point of an errorbar plot to an
+        NBPlot axis, which updates its existing plot in place.
+        """
+        markers = "osp+xv^<>"
+        point = self[index]
+        if isinstance(point, MonoidList):
+            for channel, (part, color, marker) in enumerate(
+                    zip(point, cycle(self.color_cycle), cycle(markers))):
+                axis.series("channel {}".format(channel), index,
+                            xs[index], float(part), float(part.err()),
+                            fmt="", color=color, marker=marker,
+                            linestyle="None")
+        else:
+            axis.series("data", index, xs[index], float(point),
+                        float(point.err()), fmt="d")
 
     def max(self):
         """
@@ -321,3 +751,25 @@ class ListOfMonoids(list):
         """
         return np.nanmin(np.array(self.values()) -
                          np.array(self.err()))
+
+
+class ListOfMonoids(MonoidPlotting, list):
+    """
+    A modified list class with special helpers for handlings
+    lists of Monoids
+    """
+    def values(self):
+        """
+        Get the numerical values from the List
+        """
+        if self and isinstance(self[0], MonoidList):
+            return np.array([[float(v) for v in y] for y in self]).T
+        return np.array([float(y) for y in self])
+
+    def err(self):
+        """
+        Get the uncertainty values from the List
+        """
+        if self and isinstance(self[0], MonoidList):
+            return np.array([y.err() for y in self]).T
+        return np.array([y.err() for y in self])
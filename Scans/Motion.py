@@ -12,6 +12,7 @@ which gives a simple framework for all physical parameters that
 can be controlled by an instrument.  Although it is called Motion,
 it will also handle temperatures, currents, and other physical properties.
 """
+import numpy as np
 
 
 class Motion(object):
@@ -29,13 +30,21 @@ class Motion(object):
     >>> Foo()
     5
 
+    The velocity, acceleration, and settle time of the motion are
+    optional and are only used to estimate how long a scan will take.
+
     """
-    def __init__(self, getter, setter, title, low=None, high=None):
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, getter, setter, title, low=None, high=None,
+                 velocity=None, acceleration=None, settle=0):
         self.getter = getter
         self.setter = setter
         self.title = title
         self._low = low
         self._high = high
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.settle = settle
 
     def __call__(self, x=None):
         if x is None:
@@ -86,6 +95,40 @@ class Motion(object):
                         x, self.high, self.title))
         return (True, "Position is Accessible")
 
+    def move_time(self, distance, velocity=None):
+        """Estimate how long the motion takes to travel a distance.
+
+        Parameters
+        ==========
+        distance
+          An array of the distances to travel
+        velocity
+          The speed to assume if the motion has no velocity of its own
+
+        Returns
+        =======
+
+        An array of the time, in seconds, taken by each move.  The
+        motion accelerates up to its full velocity, travels, and then
+        decelerates before waiting for the settle time.  Without a
+        known velocity, moves are assumed to be instantaneous.
+
+        """
+        distance = np.abs(np.asarray(distance, dtype=np.float64))
+        if self.velocity:
+            velocity = self.velocity
+        if not velocity:
+            return np.zeros_like(distance)
+        if self.acceleration:
+            ramp = velocity / float(self.acceleration)
+            time = np.where(
+                distance >= velocity * ramp,
+                distance / velocity + ramp,
+                2 * np.sqrt(distance / float(self.acceleration)))
+        else:
+            time = distance / float(velocity)
+        return np.where(distance > 0, time + self.settle, 0.0)
+
     def require(self, x):
         """Requires that the given position is accessible.  If not, an
         exception is thrown
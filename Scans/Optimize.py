@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""The Optimize module holds the numerical routines behind the fits,
+which work on plain arrays rather than Fit objects.  These are the
+scipy optimizer, a Levenberg-Marquardt optimizer which fits many sets
+of data at once, and the closed form estimates of a peak or an edge
+which give the optimizers their starting point.
+
+"""
+from sys import platform
+import ctypes
+import os
+import warnings
+import numpy as np
+
+# The console handler must outlive the call which installs it
+_HANDLERS = []
+
+
+def _prepare_scipy():
+    """Stop the Intel fortran runtime loaded by scipy from crashing
+    python on Ctrl+C.  This must be done before scipy is first
+    imported, so scipy is only imported through this module when a fit
+    needs it.
+
+    """
+    if _HANDLERS:
+        return
+    if platform != "win32":
+        os.environ['FOR_DISABLE_CONSOLE_CTRL_HANDLER'] = "T"
+        _HANDLERS.append(None)
+        return
+
+    def handler(_):
+        """Basic handler for KeyboardInterrupt
+
+    This handler bypasses the Intel handler and prevents Python from
+    completely crashing on a Ctrl+C
+
+        """
+        try:
+            import _thread
+        except ImportError:
+            import thread as _thread
+        _thread.interrupt_main()
+        return 1
+
+    basepath = r"C:\Instrument\Apps\Python\Lib\site-packages\numpy\core"
+    ctypes.CDLL(os.path.join(basepath, "libmmd.dll"))
+    ctypes.CDLL(os.path.join(basepath, "libifcoremd.dll"))
+    routine = ctypes.WINFUNCTYPE(ctypes.c_int, ctypes.c_uint)(handler)
+    ctypes.windll.kernel32.SetConsoleCtrlHandler(routine, 1)
+    _HANDLERS.append(routine)
+
+
+def erf(xs):
+    """The error function from scipy"""
+    _prepare_scipy()
+    # pylint: disable=no-name-in-module
+    from scipy.special import erf as scipy_erf
+    return scipy_erf(xs)
+
+
+def curve_fit(*args, **kwargs):
+    """Call the scipy curve_fit optimizer, ignoring its warnings that
+    the covariance could not be estimated."""
+    _prepare_scipy()
+    from scipy.optimize import curve_fit as scipy_curve_fit, OptimizeWarning
+    warnings.simplefilter("ignore", OptimizeWarning)
+    return scipy_curve_fit(*args, **kwargs)
+
+
+def jacobian_columns(*columns):
+    """Stack the derivatives with respect to each parameter into the
+    last axis of a jacobian, broadcasting them to the same shape."""
+    return np.stack(np.broadcast_arrays(*columns), axis=-1)
+
+
+def design_covariance(design):
+    """Find the covariance of the parameters of a least squares problem
+    from its weighted design matrix.  A parameter which the data does
+    not constrain has an infinite variance, rather than the zero given
+    by a pseudo-inverse."""
+    size = design.shape[1]
+    # Scale each parameter to unit norm, so that the rank does not
+    # depend on the units of the parameters
+    norms = np.sqrt(np.sum(design**2, axis=0))
+    if not np.all(norms > 0) or \
+            np.linalg.matrix_rank(design / norms) < size:
+        return np.full((size, size), np.inf)
+    scaled = design / norms
+    return np.linalg.inv(np.dot(scaled.T, scaled)) / np.outer(norms, norms)
+
+
+def _solve(matrices, vectors):
+    """Solve a stack of linear systems"""
+    try:
+        return np.linalg.solve(matrices, vectors[..., np.newaxis])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.matmul(np.linalg.pinv(matrices),
+                         vectors[..., np.newaxis])[..., 0]
+
+
+# pylint: disable=too-many-arguments, too-many-locals
+def levenberg_marquardt(model, jacobian, x, ys, params, iterations,
+                        tolerance=1.49012e-08):
+    """
+    Fit a model to many sets of data at once.  Every set is measured at
+    the same positions, so each step of the optimisation evaluates the
+    model for all of the sets together and solves their normal
+    equations as a single stack.  The damping of each set is adjusted
+    separately and a set stops once its residuals stop improving.
+
+    Parameters
+    ----------
+    model : function
+      The model, which must broadcast over columns of parameters
+    jacobian : function
+      The derivatives of the model with respect to each parameter
+    x : Array of Float
+      The positions of the measurements
+    ys : 2D Array of Float
+      The measurements, with a row for each set
+    params : 2D Array of Float
+      The starting parameters, with a row for each set
+    iterations : int
+      The most steps to take
+
+    Returns
+    -------
+    The fitted parameters and whether the fit of each set converged
+    """
+    def residuals(rows, trial):
+        """The residuals of some of the sets with trial parameters"""
+        return ys[rows] - model(x, *trial.T[:, :, np.newaxis])
+
+    params = np.array(params, dtype=np.float64)
+    residual = residuals(slice(None), params)
+    cost = np.sum(residual**2, axis=1)
+    damping = np.full(len(params), 1.0)
+    # As in MINPACK, each parameter is damped by the largest curvature
+    # seen so far, so that a parameter cannot run away once the model
+    # stops depending on it
+    curvature = np.zeros(params.shape)
+    done = np.zeros(len(params), dtype=bool)
+    for _ in range(iterations):
+        rows = np.flatnonzero(~done)
+        if not len(rows):
+            break
+        derivatives = jacobian(x, *params[rows].T[:, :, np.newaxis])
+        normal = np.einsum("cni,cnj->cij", derivatives, derivatives)
+        gradient = np.einsum("cni,cn->ci", derivatives, residual[rows])
+        curvature[rows] = np.maximum(curvature[rows],
+                                     np.einsum("cii->ci", normal))
+        scale = curvature[rows] * damping[rows, np.newaxis]
+        step = _solve(normal + scale[:, :, np.newaxis] *
+                      np.eye(params.shape[1]), gradient)
+        trial = params[rows] + step
+        trial_residual = residuals(rows, trial)
+        trial_cost = np.sum(trial_residual**2, axis=1)
+
+        better = trial_cost < cost[rows]
+        accepted = rows[better]
+        small = (cost[rows] - trial_cost <= tolerance * cost[rows]) | \
+            np.all(np.abs(step) <= tolerance * (np.abs(params[rows]) +
+                                                tolerance), axis=1)
+        params[accepted] = trial[better]
+        residual[accepted] = trial_residual[better]
+        cost[accepted] = trial_cost[better]
+        damping[accepted] /= 3.0
+        damping[rows[~better]] *= 2.0
+        # Once no damped step improves the fit, it is at a minimum
+        done[rows[(better & small) | (damping[rows] > 1e10)]] = True
+    converged = done & np.isfinite(cost) & np.all(np.isfinite(params), axis=1)
+    return params, converged
+
+
+def _finite(x, y):
+    """Sort the measurements by position, dropping any missing values"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.isfinite(x) & np.isfinite(y)
+    order = np.argsort(x[keep])
+    return x[keep][order], y[keep][order]
+
+
+def log_parabola(x, y):
+    """
+    Estimate the parameters of a gaussian peak with Caruana's method.
+    The logarithm of a gaussian is a parabola, so a quadratic is fitted
+    to the logarithm of the signal above the background.  Each point is
+    weighted by its signal, as suggested by Guo, since the logarithm
+    magnifies the noise on the small values in the tails of the peak.
+    Points below a tenth of the height of the peak are left out, since
+    the noise on the background would otherwise widen the peak.
+
+    Returns
+    -------
+    The center, sigma, amplitude, and background of the peak
+    """
+    x, y = _finite(x, y)
+    if len(y) < 3:
+        raise RuntimeError("At least three points are needed to find "
+                           "a peak")
+    background = np.min(y)
+    signal = y - background
+    keep = signal > np.max(signal) / 10
+    if np.sum(keep) < 3:
+        raise RuntimeError("Too few points rise above the background")
+    curve, slope, offset = np.polyfit(x[keep], np.log(signal[keep]), 2,
+                                      w=signal[keep])
+    if curve >= 0:
+        raise RuntimeError("The data does not curve down like a peak")
+    return np.array([-slope / 2 / curve,
+                     np.sqrt(-1 / 2 / curve),
+                     np.exp(offset - slope**2 / 4 / curve),
+                     background])
+
+
+def moments(x, y):
+    """
+    Estimate the parameters of a peak from the centroid and spread of
+    the signal above the background.
+
+    Returns
+    -------
+    The center, sigma, amplitude, and background of the gaussian with
+    the same moments and area as the peak
+    """
+    x, y = _finite(x, y)
+    if not len(y):
+        raise RuntimeError("There are no points to measure")
+    background = np.min(y)
+    signal = y - background
+    total = np.sum(signal)
+    if total <= 0:
+        raise RuntimeError("There is no signal above the background")
+    center = np.sum(signal * x) / total
+    sigma = np.sqrt(np.sum(signal * (x - center)**2) / total)
+    if sigma <= 0:
+        raise RuntimeError("The signal comes from a single point")
+    area = np.sum((signal[1:] + signal[:-1]) / 2 * np.diff(x))
+    return np.array([center, sigma, area / sigma / np.sqrt(2 * np.pi),
+                     background])
+
+
+def half_maximum(x, y):
+    """
+    Estimate the parameters of a peak from where it crosses half of
+    its height.  The crossings are linearly interpolated between the
+    neighbouring points.  If the peak does not fall to half its height
+    on one side, the last point on that side is used.
+
+    Returns
+    -------
+    The center, sigma, amplitude, and background of the gaussian with
+    the same full width at half maximum
+    """
+    x, y = _finite(x, y)
+    if not len(y):
+        raise RuntimeError("There are no points to measure")
+    peak = np.argmax(y)
+    background = np.min(y)
+    height = y[peak] - background
+    if height <= 0:
+        raise RuntimeError("There is no signal above the background")
+    half = background + height / 2
+
+    def crossing(inner, outer):
+        """Interpolate the position of half height between two points"""
+        return x[outer] + (half - y[outer]) * (x[inner] - x[outer]) / \
+            (y[inner] - y[outer])
+
+    below = np.flatnonzero(y[:peak] <= half)
+    left = crossing(below[-1] + 1, below[-1]) if len(below) else x[0]
+    below = np.flatnonzero(y[peak:] <= half)
+    right = crossing(peak + below[0] - 1, peak + below[0]) \
+        if len(below) else x[-1]
+    if right <= left:
+        raise RuntimeError("The peak has no width")
+    return np.array([(left + right) / 2,
+                     (right - left) / 2 / np.sqrt(2 * np.log(2)),
+                     height, background])
+
+
+def steepest(x, y):
+    """
+    Estimate the parameters of an edge from the steepest point of the
+    data.  The position of the steepest slope is refined by fitting a
+    parabola through the slopes of its neighbours.
+
+    Returns
+    -------
+    The center, stretch, scale, and background of the error function
+    with the same steepest slope and the same range
+    """
+    x, y = _finite(x, y)
+    if len(y) < 3:
+        raise RuntimeError("At least three points are needed to find "
+                           "an edge")
+    slopes = np.gradient(y, x)
+    index = np.argmax(np.abs(slopes))
+    center = x[index]
+    if 0 < index < len(x) - 1:
+        near = slice(index - 1, index + 2)
+        curve, slope, _ = np.polyfit(x[near], np.abs(slopes[near]), 2)
+        if curve < 0:
+            center = -slope / 2 / curve
+    scale = np.copysign((np.max(y) - np.min(y)) / 2, slopes[index])
+    if scale == 0:
+        raise RuntimeError("The data is flat")
+    # The steepest slope of the error function is 2*scale*stretch/sqrt(pi)
+    return np.array([center,
+                     slopes[index] * np.sqrt(np.pi) / 2 / scale,
+                     scale,
+                     (np.max(y) + np.min(y)) / 2])
@@ -0,0 +1,277 @@
+"""The Pipeline module lets the bookkeeping for each point of a scan
+run alongside the measurement of the next point.
+
+Once a count has finished, the only thing that the instrument needs
+before it can start the next count is to move the motors.  Writing the
+log, updating the plot, and refitting the data can all happen while the
+motors are moving.  Fits which take longer than a count can be moved
+into a separate process entirely.
+"""
+from multiprocessing import Process, Pipe
+import sys
+import threading
+from traceback import format_exc
+import numpy as np
+import six
+from six.moves import queue
+
+
+class PointWorker(object):
+    """Handle the measured points of a scan.
+
+    Each measured point is passed to the record function and the latest
+    value returned by that function is kept in ``result``.  If threaded
+    is true, the points are recorded on a background thread, so that
+    the scan can move on to the next point immediately.  Points are
+    always recorded in the order in which they were measured.
+
+    Any error raised while recording a point is raised again in the
+    scanning thread when the next point arrives or when the worker is
+    closed.
+
+    Parameters
+    ----------
+    record : function
+      The function to call with each measured point
+    threaded : bool
+      Whether to record the points on a background thread
+
+    """
+    def __init__(self, record, threaded=False):
+        self.record = record
+        self.threaded = threaded
+        self.result = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._error = None
+
+    def __call__(self, *args):
+        if self._error is not None:
+            six.reraise(*self._error)
+        if self._thread is None:
+            self.result = self.record(*args)
+        else:
+            self._queue.put(args)
+
+    def _run(self):
+        while True:
+            args = self._queue.get()
+            if args is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self.result = self.record(*args)
+            except Exception:  # pylint: disable=broad-except
+                self._error = sys.exc_info()
+
+    def __enter__(self):
+        if self.threaded:
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def __exit__(self, typ, value, traceback):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if typ is None and self._error is not None:
+            six.reraise(*self._error)
+
+
+class Snapshot(object):
+    """The measured values of a scan at one moment, which can be sent to
+    another process.  It offers the same values and err methods as
+    the list of monoids it was taken from.
+
+    Parameters
+    ----------
+    ys : MonoidArray
+      The measured values
+
+    """
+    def __init__(self, ys):
+        self._values = np.array(ys.values(), dtype=np.float64)
+        self._err = np.array(ys.err(), dtype=np.float64)
+
+    def values(self):
+        """The value of each measurement"""
+        return self._values
+
+    def err(self):
+        """The uncertainty on each measurement"""
+        return self._err
+
+
+class _Commands(object):
+    """Record the commands that a fit action gives its plot, so that
+    they can be replayed on the real plot in another process."""
+    def __init__(self):
+        self.commands = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            """Keep the command to send on later"""
+            self.commands.append((name, args, kwargs))
+        return record
+
+
+class _Failure(object):
+    """An error raised while fitting in another process, along with
+    the traceback from that process."""
+    def __init__(self, error, trace):
+        self.error = error
+        self.trace = trace
+
+    def reraise(self):
+        """Raise the error again in the scanning process"""
+        six.raise_from(self.error, RuntimeError(
+            "The fitting process failed with\n\n" + self.trace))
+
+
+def _fit_loop(fit, requests, results):  # pragma: no cover
+    """Fit the latest snapshot of a scan until told to stop.  Any
+    snapshots which arrive while a fit is running are replaced by the
+    newest one, so the worker never falls behind the scan.  If a fit
+    fails, the error is sent back in place of the result and the loop
+    stops."""
+    action = fit.fit_plot_action()
+    running = True
+    while running:
+        latest = None
+        while True:
+            request = requests.recv()
+            if request is None:
+                running = False
+            else:
+                latest = request
+            if not requests.poll():
+                break
+        if latest is not None:
+            figure = _Commands()
+            try:
+                params = action(latest[0], latest[1], figure)
+            except Exception as error:  # pylint: disable=broad-except
+                trace = format_exc()
+                try:
+                    results.send(_Failure(error, trace))
+                except Exception:  # pylint: disable=broad-except
+                    # The error itself could not be sent
+                    results.send(_Failure(RuntimeError(repr(error)), trace))
+                return
+            results.send((params, figure.commands))
+    results.send(None)
+
+
+class FitWorker(object):
+    """Fit the points of a scan in a separate process.
+
+    The worker is the action of a scan's plot.  Each call sends a
+    snapshot of the measurements to the fitting process and returns
+    straight away with the most recent fit, so the scan never waits on
+    the optimizer.  The fitting process only works on the newest
+    snapshot, dropping any that arrived while it was busy, and the
+    fitted curve is drawn on the plot as soon as it is ready.  Once the
+    worker is closed, ``result`` holds the fit of the final snapshot.
+
+    If a fit raises an error, the fitting process stops and the error
+    is raised again in the scan at the next call or when the worker is
+    closed.
+
+    Parameters
+    ----------
+    fit : Fit
+      The model to fit
+
+    """
+    def __init__(self, fit):
+        self.fit = fit
+        self.result = None
+        self._requests = None
+        self._results = None
+        self._process = None
+        self._listener = None
+        self._failure = None
+
+    def __call__(self, x, y, fig):
+        if self._process is None:
+            # The fitting process has already stopped
+            return self.result
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen,
+                                              args=(fig,))
+            self._listener.daemon = True
+            self._listener.start()
+        if self._failure is None and self._process.is_alive():
+            try:
+                self._requests.send((np.array(x, dtype=np.float64),
+                                     Snapshot(y)))
+                return self.result
+            except (IOError, OSError):
+                # The process stopped after it was checked
+                pass
+        self._stop()
+        return self.result
+
+    def _listen(self, fig):
+        """Draw each fit on the plot as it arrives"""
+        while True:
+            try:
+                message = self._results.recv()
+            except EOFError:  # pragma: no cover
+                return
+            if message is None:
+                return
+            if isinstance(message, _Failure):
+                self._failure = message
+                return
+            params, commands = message
+            for name, args, kwargs in commands:
+                getattr(fig, name)(*args, **kwargs)
+            self.result = params
+
+    def __enter__(self):
+        requests, self._requests = Pipe(duplex=False)
+        self._results, results = Pipe(duplex=False)
+        self._process = Process(target=_fit_loop,
+                                args=(self.fit, requests, results))
+        self._process.daemon = True
+        self._process.start()
+        # Only the fitting process keeps its ends of the pipes, so that
+        # the listener notices if the process dies
+        requests.close()
+        results.close()
+        return self
+
+    def close(self):
+        """Wait for the fit of the final snapshot, then stop the fitting
+        process.  Closing the worker again does nothing."""
+        if self._process is None:
+            return
+        try:
+            self._requests.send(None)
+        except (IOError, OSError):
+            # The process has already stopped
+            pass
+        self._stop()
+
+    def _stop(self):
+        """Wait for the fitting process to finish, raising any error
+        which stopped it."""
+        if self._listener is None:
+            self._listen(None)
+        else:
+            self._listener.join()
+        process = self._process
+        self._process = None
+        process.join()
+        if self._failure is not None:
+            self._failure.reraise()
+        if process.exitcode:
+            raise RuntimeError("The fitting process failed with exit code "
+                               "{}".format(process.exitcode))
+
+    def __exit__(self, typ, value, traceback):
+        self.close()
@@ -0,0 +1,270 @@
+"""The Plan module holds the table of positions which a scan is
+flattened into before it is run, and the index which matches measured
+positions back to the points of a scan.
+
+"""
+from __future__ import absolute_import
+from collections import OrderedDict
+import hashlib
+import numpy as np
+
+
+def check_resume(plan, resume):
+    """Make sure that a checkpoint was saved by the same scan plan
+    which is resuming it."""
+    saved = resume.get("plan")
+    if saved is not None and saved != plan.fingerprint():
+        raise RuntimeError(
+            "The checkpoint was saved by a different scan.  Resume it "
+            "with the same scan which was interrupted.")
+
+
+def _merge_columns(first, second):
+    """Combine the column names and actions of two scan plans.  When
+    both plans control the same axis, the action from the first plan
+    is kept, but the column is shared."""
+    names = list(first.names)
+    actions = list(first.actions)
+    for name, action in zip(second.names, second.actions):
+        if name not in names:
+            names.append(name)
+            actions.append(action)
+    return names, actions
+
+
+def _empty_table(names, length):
+    """Create a position table where no axis is moved at any point."""
+    table = np.zeros(length, dtype=[(name, np.float64) for name in names])
+    for name in names:
+        table[name] = np.nan
+    return table
+
+
+class ScanPlan(object):
+    """A ScanPlan is a scan which has been flattened into a table of
+    positions.  Each column of the table holds the positions of a
+    single axis and each row is a point in the scan.  A NaN in the
+    table means that the axis is not moved for that point.
+
+    Iterating over the plan moves the instrument through each row of
+    the table, yielding the current positions of the axes at each
+    point.  An axis is only moved when its requested position differs
+    from the previous point.
+
+    Parameters
+    ----------
+    names : list of str
+      The name of the axis for each column
+    actions : list of Motion
+      The motion which controls each column
+    positions : numpy structured array
+      The table of positions with one field per axis
+    forever : bool
+      If true, the plan cycles through the table until stopped
+    offset : int
+      The row of the table at which the first cycle of the plan starts
+
+    """
+    #: Whether the next point can be measured while the last one is
+    #: still being recorded
+    pipelines = True
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, names, actions, positions, forever=False, offset=0):
+        self.names = names
+        self.actions = actions
+        self.positions = positions
+        self.forever = forever
+        self.offset = offset
+
+    def __len__(self):
+        if self.forever:
+            raise RuntimeError(
+                "Attempted to get the length of an infinite list")
+        return len(self.positions)
+
+    def __iter__(self):
+        targets = {}
+        readback = {}
+        offset = self.offset
+        while True:
+            for row in self.positions[offset:]:
+                position = OrderedDict()
+                for name, action in zip(self.names, self.actions):
+                    target = row[name]
+                    if np.isnan(target):
+                        continue
+                    if targets.get(name) != target:
+                        action(target)
+                        targets[name] = target
+                        readback[name] = action()
+                    position[name] = readback[name]
+                yield position
+            if not self.forever:
+                return
+            offset = 0
+
+    def watch(self, xs, ys):
+        """Give the plan the positions and values measured so far.  A
+        plan with a fixed table of positions does not need them, but a
+        plan which chooses its points as it runs will."""
+
+    def skip(self, count):
+        """Create a plan which leaves out the first count points of this
+        plan.  A plan which cycles forever still runs every point on
+        its later cycles."""
+        if self.forever:
+            return ScanPlan(self.names, self.actions, self.positions,
+                            forever=True,
+                            offset=count % len(self.positions))
+        return ScanPlan(self.names, self.actions, self.positions[count:])
+
+    def __repr__(self):
+        return "ScanPlan({}, {} points)".format(self.names,
+                                                len(self.positions))
+
+    def fingerprint(self):
+        """Summarise the axes and positions of the plan, so that a
+        checkpoint can be matched to the plan which saved it."""
+        positions = np.ascontiguousarray(self.positions)
+        return {"names": list(self.names), "length": len(positions),
+                "positions": hashlib.sha1(positions.tobytes()).hexdigest()}
+
+    def min(self):
+        """Find the smallest position of each axis"""
+        return OrderedDict((name, np.nanmin(self.positions[name]))
+                           for name in self.names)
+
+    def max(self):
+        """Find the largest position of each axis"""
+        return OrderedDict((name, np.nanmax(self.positions[name]))
+                           for name in self.names)
+
+    def then(self, other):
+        """Create a plan which runs this plan followed by another"""
+        names, actions = _merge_columns(self, other)
+        table = _empty_table(names, len(self) + len(other))
+        for name in self.names:
+            table[name][:len(self)] = self.positions[name]
+        for name in other.names:
+            table[name][len(self):] = other.positions[name]
+        return ScanPlan(names, actions, table)
+
+    def product(self, inner, backward=None):
+        """Create a plan which runs the whole of the inner plan at each
+        point of this plan.  If a backward plan is given, it is run in
+        place of the inner plan on every other point."""
+        names, actions = _merge_columns(self, inner)
+        table = _empty_table(names, len(self) * len(inner))
+        for name in self.names:
+            table[name] = np.repeat(self.positions[name], len(inner))
+        for name in inner.names:
+            if backward is None:
+                column = np.tile(inner.positions[name], len(self))
+            else:
+                column = np.tile(
+                    np.concatenate([inner.positions[name],
+                                    backward.positions[name]]),
+                    (len(self) + 1) // 2)[:len(table)]
+            if name in self.names:
+                column = np.where(np.isnan(column), table[name], column)
+            table[name] = column
+        return ScanPlan(names, actions, table)
+
+    def distances(self, start=None):
+        """Find how far each axis must move to reach each point of the
+        plan.  The result is an array with a row for each point and a
+        column for each axis.  The move to the first point is measured
+        from the positions in the start dictionary, if given.
+        Otherwise, it is counted as zero."""
+        if start is None:
+            start = {}
+        result = np.zeros((len(self.positions), len(self.names)))
+        steps = np.arange(len(self.positions) + 1)
+        for column, name in enumerate(self.names):
+            values = np.concatenate([[start.get(name, np.nan)],
+                                     self.positions[name]])
+            # Carry the last requested position over the points where
+            # the axis is not moved
+            filled = values[np.maximum.accumulate(
+                np.where(np.isnan(values), 0, steps))]
+            moves = np.abs(np.diff(filled))
+            result[:, column] = np.where(np.isnan(moves), 0, moves)
+        return result
+
+    def move_times(self, start=None, velocity=None):
+        """Estimate the time spent moving to each point of the plan.  The
+        axes are moved one after another, so the time for each point is
+        the sum of the times for every axis.  The velocity is used for
+        any axis that does not know its own speed."""
+        if not self.names:
+            return np.zeros(len(self.positions))
+        distances = self.distances(start)
+        times = np.array([
+            action.move_time(distances[:, column], velocity=velocity)
+            for column, action in enumerate(self.actions)])
+        return np.sum(times, axis=0)
+
+    def zip(self, other):
+        """Create a plan which runs both plans in lock step"""
+        names, actions = _merge_columns(self, other)
+        length = min(len(self), len(other))
+        table = _empty_table(names, length)
+        for name in self.names:
+            table[name] = self.positions[name][:length]
+        for name in other.names:
+            column = other.positions[name][:length]
+            if name in self.names:
+                column = np.where(np.isnan(column), table[name], column)
+            table[name] = column
+        return ScanPlan(names, actions, table)
+
+
+class PositionIndex(object):
+    """A PositionIndex records the distinct positions measured in a
+    scan and finds the index of a position in constant time.  Positions
+    which lie within the tolerance of each other are treated as the
+    same point, so that readback noise on a motor does not split a
+    single point into many.
+
+    Parameters
+    ----------
+    tolerance : float
+      The largest distance between two positions which are still
+      considered to be the same point.  This must be positive.
+
+    """
+    def __init__(self, tolerance):
+        if not tolerance > 0:
+            raise ValueError(
+                "The tolerance on the positions must be positive, "
+                "not {}".format(tolerance))
+        self.tolerance = tolerance
+        self.positions = []
+        self._bins = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _key(self, position):
+        return int(np.floor(position / self.tolerance))
+
+    def find(self, position):
+        """Return the index of a previously seen position, or None if
+        the position is new."""
+        key = self._key(position)
+        for neighbour in (key, key - 1, key + 1):
+            for index in self._bins.get(neighbour, []):
+                if abs(self.positions[index] - position) <= self.tolerance:
+                    return index
+        return None
+
+    def add(self, position):
+        """Return the index of a position, recording it as a new point if
+        it has not been seen before."""
+        index = self.find(position)
+        if index is None:
+            index = len(self.positions)
+            self.positions.append(position)
+            self._bins.setdefault(self._key(position), []).append(index)
+        return index
@@ -10,12 +10,17 @@ treated as private.
 """
 from __future__ import absolute_import, print_function
 from abc import ABCMeta, abstractmethod
-from collections import Iterable, OrderedDict
+from functools import wraps
+import os
+import threading
 import numpy as np
 from six import add_metaclass
-import six
-from .Monoid import ListOfMonoids, Monoid
+from .Monoid import Monoid
+from .Arrays import MonoidArray
 from .Detector import DetectorManager
+from .Log import ScanLog, load_checkpoint, checkpoint_path
+from .Plan import ScanPlan, PositionIndex, check_resume
+from .Pipeline import PointWorker, FitWorker
 from .Fit import Fit, ExactFit
 
 try:
@@ -36,22 +41,71 @@ def just_times(kwargs):
             if x in TIME_KEYS}
 
 
-def merge_dicts(x, y):
-    """Given two dicts, merge them into a new dict as a shallow copy."""
-    final = x.copy()
-    final.update(y)
-    return final
-
-
-def _plot_range(array):
-    if not array:
-        return (-0.05, 0.05)
-    # array = [float(x) for x in array]
-    low = array.min()
-    high = array.max()
-    diff = high-low
-    return (low - 0.05 * diff,
-            high + 0.05 * diff)
+def precise(fit, precision):
+    """Make a function which checks whether the live fit of a scan has
+    reached the requested precision on each named parameter."""
+    def until(xs, ys, params):
+        """Check the uncertainty of the latest fit"""
+        if params is None:
+            return False
+        errors = fit.uncertainty(xs, ys, params)
+        if not isinstance(errors, list):
+            errors = [errors]
+        return all(error is not None and
+                   all(error[key] <= precision[key] for key in precision)
+                   for error in errors)
+    return until
+
+
+def watch(until):
+    """Keep hold of the data of a scan, so that the final fit can be
+    repeated once the scan has finished.  The data is found on the
+    xs and ys attributes of the returned function."""
+    def wrapper(xs, ys, params):
+        """Remember the data before passing it on"""
+        wrapper.xs, wrapper.ys = xs, ys
+        return until is not None and until(xs, ys, params)
+    wrapper.xs, wrapper.ys = [], None
+    return wrapper
+
+
+def combine_channels(fit, result, fits):
+    """Report the median of the fits to each channel of a detector,
+    along with the fits of the channels themselves.  The resampled
+    fits, if any, give the confidence intervals."""
+    channels = [None if x is None else fit.readable(x) for x in result]
+    result = np.array([x for x in result if x is not None])
+    result = fit.readable(np.median(result, axis=0))
+    result["channels"] = channels
+    if fits is not None:
+        result["intervals"] = fit.intervals(np.nanmedian(fits, axis=1))
+        for channel, values in zip(channels, np.swapaxes(fits, 0, 1)):
+            if channel is not None:
+                channel["intervals"] = fit.intervals(values)
+    return result
+
+
+def cached(method):
+    """Compute the result of a method which takes no arguments only once
+    and reuse it on every later call.  This is only safe on scans, which
+    are never modified after they have been made."""
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self):
+        """Look up the cached result before calculating it"""
+        cache = self.__dict__.setdefault("_cache", {})
+        if name not in cache:
+            cache[name] = method(self)
+        return cache[name]
+    return wrapper
+
+
+def freeze(values):
+    """Copy a list of positions into a read-only array."""
+    values = np.array(values, dtype=np.float64)
+    values.flags.writeable = False
+    return values
 
 
 def estimate(seconds=None, minutes=None, hours=None,
@@ -82,7 +136,12 @@ def estimate(seconds=None, minutes=None, hours=None,
 class Scan(object):
     """The virtual class that represents all controlled scans.  This class
     should never be instantiated directly, but rather by one of its
-    subclasses."""
+    subclasses.
+
+    Scans are values which cannot be changed once they have been made.
+    Methods such as map and reverse create new scans instead.  This
+    allows the length, bounds, and representation of a scan to be
+    calculated once and cached."""
 
     defaults = None
 
@@ -98,26 +157,26 @@ class Scan(object):
         """The map function returns a modified scan that performs the given
         function on all of the original positions to return the new positions.
         """
-        pass
 
     @property
     @abstractmethod
     def reverse(self):
         """Create a new scan that runs in the opposite direction"""
-        pass
 
     @abstractmethod
     def min(self):
         """Find the smallest point in a scan"""
-        pass
 
     @abstractmethod
     def max(self):
         """Find the largest point in a scan"""
-        pass
+
+    @abstractmethod
+    def compile(self):
+        """Flatten the scan into a ScanPlan table of positions"""
 
     def __iter__(self):
-        pass
+        return iter(self.compile())
 
     def __add__(self, x):
         return SumScan(self, x)
@@ -143,58 +202,124 @@ class Scan(object):
         """
         return self + self.reverse
 
+    # pylint: disable=too-many-arguments, too-many-locals
+    # pylint: disable=too-many-statements
     def plot(self, detector=None, save=None,
-             action=None, **kwargs):
+             action=None, pipeline=False, resume=None, combine=None,
+             until=None, **kwargs):
         """Run over the scan an perform a simple measurement at each position.
         The measurement parameter can be used to set what type of measurement
         is to be taken.  If the save parameter is set to a file name, then the
-        plot will be saved in that file."""
+        plot will be saved in that file.  If the pipeline parameter is true,
+        the log, plot, and action for each point are handled on a
+        background thread while the motors move to the next point.  The
+        resume parameter takes the checkpoint of an interrupted scan,
+        whose measured points are skipped and added to the new results.
+        The combine parameter is a monoid class, such as WeightedMean,
+        which every measurement is turned into before repeated
+        measurements of a point are combined.  The until parameter is
+        a function which is given the positions, the values, and the
+        result of the action after each point.  Once it returns true,
+        the scan finishes without measuring the remaining points.  When
+        pipelining, the next point may already have been measured."""
         import warnings
         warnings.simplefilter("ignore", UserWarning)
 
         detector = self._normalise_detector(detector)
-        axis = NBPlot()
-
-        xs = []
-        ys = ListOfMonoids()
 
-        action_remainder = None
+        index = PositionIndex(self.defaults.tolerance)
+        xs = index.positions
+        ys = MonoidArray()
+        plan = self.compile()
+        if pipeline and not plan.pipelines:
+            raise TypeError("This scan chooses each point from the "
+                            "results of the points before, so it cannot "
+                            "be pipelined.")
+        fingerprint = plan.fingerprint()
+        start = 0
+        if resume:
+            check_resume(plan, resume)
+            start = resume["point"]
+            for position in resume["state"][0]:
+                index.add(position)
+            ys.extend(resume["state"][1])
+
+        plan = plan.skip(start)
+        plan.watch(xs, ys)
+        axis = NBPlot()
+        axis.set_xlabel(plan.names[0])
+        if isinstance(self.min(), tuple):
+            rng = [1.05*self.min()[0] - 0.05 * self.max()[0],
+                   1.05*self.max()[0] - 0.05 * self.min()[0]]
+        else:
+            rng = [1.05*self.min() - 0.05 * self.max(),
+                   1.05*self.max() - 0.05 * self.min()]
+        axis.set_xlim(rng[0], rng[1])
+        for point in range(len(ys)):
+            ys.plot_point(axis, xs, point)
+
+        finished = threading.Event()
+        worker = None
         try:
-            with open(self.defaults.log_file(), "w") as logfile, \
+            with ScanLog(self.defaults.log_file(), start=start,
+                         plan=fingerprint) as log, \
                  detector(self, save, **kwargs) as detect:
-                for x in self:
-                    # FIXME: Handle multidimensional plots
-                    (label, position) = next(iter(x.items()))
-                    value = detect(**just_times(kwargs))
+                log.state = (xs, ys)
+
+                def record(x, value):
+                    """Add a measured point to the log and the plot"""
                     if isinstance(value, float):
                         value = Average(value)
-                    if position in xs:
-                        ys[xs.index(position)] += value
+                    if combine:
+                        value = combine.zero().upgrade(value)
+                    # FIXME: Handle multidimensional plots
+                    point = index.add(next(iter(x.values())))
+                    if point < len(ys):
+                        ys.accumulate(point, value)
                     else:
-                        xs.append(position)
                         ys.append(value)
-                    logfile.write("{}\t{}\n".format(xs[-1], str(ys[-1])))
-                    axis.clear()
-                    axis.set_xlabel(label)
-                    if isinstance(self.min(), tuple):
-                        rng = [1.05*self.min()[0] - 0.05 * self.max()[0],
-                               1.05*self.max()[0] - 0.05 * self.min()[0]]
-                    else:
-                        rng = [1.05*self.min() - 0.05 * self.max(),
-                               1.05*self.max() - 0.05 * self.min()]
-                    axis.set_xlim(rng[0], rng[1])
-                    rng = _plot_range(ys)
-                    axis.set_ylim(rng[0], rng[1])
-                    ys.plot(axis, xs)
-                    if action:
-                        action_remainder = action(xs, ys,
-                                                  axis)
+                    log.write(x, value)
+                    ys.plot_point(axis, xs, point)
+                    result = action(xs, ys, axis) if action else None
+                    if until and until(xs, ys, result):
+                        finished.set()
+                    return result
+
+                with PointWorker(record, pipeline) as worker:
+                    for x in plan:
+                        if finished.is_set():
+                            break
+                        worker(x, detect(**just_times(kwargs)))
         except KeyboardInterrupt:  # pragma: no cover
             pass
+        if isinstance(action, FitWorker):
+            # Draw the final fit before the plot is saved
+            action.close()
         if save:
             axis.savefig(save)
 
-        return action_remainder
+        if worker is None:
+            return None
+        return worker.result
+
+    def resume(self, log, **kwargs):
+        """Continue a scan which was interrupted.
+
+        The points which were measured before the interruption are
+        skipped and the new measurements are combined with the old
+        ones.  The remaining arguments are the same as for plot.  The
+        checkpoint of the interrupted scan is removed, since the
+        resumed scan saves its own.
+
+        Parameters
+        ----------
+        log : str
+          The log file of the interrupted scan
+
+        """
+        result = self.plot(resume=load_checkpoint(log), **kwargs)
+        os.remove(checkpoint_path(log))
+        return result
 
     def measure(self, title, measure=None, **kwargs):  # pragma: no cover
         """Perform a full measurement at each position indicated by the scan.
@@ -212,40 +337,135 @@ class Scan(object):
         for x in self:
             measure(title, x, **kwargs)
 
-    def fit(self, fit, **kwargs):
+    def fit(self, fit, precision=None, fit_process=False, bootstrap=None,
+            **kwargs):
         """The fit method performs the scan, plotting the points as they are
         taken.  Once the scan is completed, a fit is then plotted over
         the scan and the fitting parameters are returned.
 
+        When the detector has several channels, they are all fitted
+        together and the median of each parameter is returned.  The
+        fits of the individual channels are listed under the
+        "channels" key, with None for any channel which could not be
+        fitted.
+
+        The precision parameter is a dictionary of the largest
+        acceptable standard error on named fit parameters
+        (e.g. {"center": 0.05}).  After each point, the uncertainty of
+        the live fit is estimated from the uncertainties of the
+        measurements and the scan finishes as soon as every channel
+        meets the precision.  A ValueError is raised before the scan
+        starts if the precision names a parameter which the fit does
+        not have.
+
+        If fit_process is true, the live fits are performed in a
+        separate process, so that a slow fit never holds up the next
+        point.  The fit is then drawn whenever it is ready and only
+        the newest data is fitted.  This is not available for two
+        dimensional scans.
+
+        If bootstrap is given, the final fit is repeated on that many
+        copies of the data with random noise added to each point, in
+        proportion to its uncertainty.  The copies are fitted in a
+        pool of processes.  The 95% confidence interval on each
+        parameter is returned under the "intervals" key, as a
+        (lower, upper) pair.  For a detector with several channels,
+        this is the interval on the median, and each channel also has
+        its own intervals.
+
         """
 
         if not isinstance(fit, Fit):  # pragma: no cover
             raise TypeError("Cannot fit with {}. Perhaps you meant to call it"
                             " as a function?".format(fit))
 
-        result = self.plot(action=fit.fit_plot_action(), **kwargs)
+        until = None
+        if precision:
+            if isinstance(fit, ExactFit):
+                raise TypeError("Cannot judge the precision of {}".format(
+                    fit))
+            if not fit.smooth:
+                raise TypeError(
+                    "{} has no smooth gradient, so the precision of its "
+                    "parameters cannot be estimated.".format(
+                        type(fit).__name__))
+            fit.check_names(precision)
+            until = precise(fit, precision)
+        if bootstrap:
+            if isinstance(fit, ExactFit):
+                raise TypeError("Cannot resample the fit of {}".format(fit))
+            until = watch(until)
+
+        if fit_process and not isinstance(fit, ExactFit):
+            with FitWorker(fit) as worker:
+                self.plot(action=worker, until=until, **kwargs)
+            result = worker.result
+        else:
+            result = self.plot(action=fit.fit_plot_action(), until=until,
+                               **kwargs)
+
+        fits = None
+        if bootstrap and result is not None:
+            fits = fit.resample(until.xs, until.ys, result, bootstrap)
+
+        if isinstance(result, list) and not isinstance(fit, ExactFit):
+            return combine_channels(fit, result, fits)
+
+        if fits is None:
+            return fit.readable(result)
+        result = fit.readable(result)
+        result["intervals"] = fit.intervals(fits)
+        return result
 
-        if isinstance(result[0], Iterable) and not isinstance(fit, ExactFit):
-            result = np.array([x for x in result if x is not None])
-            result = np.median(result, axis=0)
+    def timing(self, pad=0, velocity=None, **kwargs):
+        """Estimate the time taken by each point of the scan.
 
-        return fit.readable(result)
+        The scan is walked from the current position of each axis and
+        the time for every move is estimated from the velocity,
+        acceleration, and settle time of its motion.  The arguments
+        are the same as for calculate.
 
-    def calculate(self, time=False, pad=0, **kwargs):
+        Returns
+        -------
+        A structured array with a row for each point.  The move field
+        holds the time spent moving the motors, the count field the
+        time spent measuring, and the overhead field the padding.
+
+        """
+        plan = self.compile()
+        start = {name: action()
+                 for name, action in zip(plan.names, plan.actions)}
+        fields = [("move", np.float64), ("count", np.float64),
+                  ("overhead", np.float64)]
+        result = np.zeros(len(plan), dtype=fields)
+        result["move"] = plan.move_times(start, velocity)
+        result["count"] = estimate(**kwargs)
+        result["overhead"] = pad
+        return result
+
+    def calculate(self, time=False, pad=0, velocity=None, **kwargs):
         """Calculate the expected time needed to perform a scan.
         Additionally, print the expected time of completion.
 
         Beyond accepting the default arguments for setting a
         measurement time (e.g uamps, minutes, frames), this method
-        accept two other keywords.  The pad argument is an extra time,
-        in seconds, to add to each measurement to account for motor
-        movements, file saving, and other such effects.  The quiet
-        keyword, if set to true, prevents the printing of the expected
-        time of completion.
+        accept three other keywords.  The pad argument is an extra time,
+        in seconds, to add to each measurement to account for file
+        saving and other such effects.  The time spent moving the motors
+        is estimated from their velocity, acceleration, and settle
+        time.  The velocity argument is the speed, in units per second,
+        of any motor which does not know its own velocity.  The time
+        keyword, if set to true, prints the expected time of
+        completion.
+
+        See the timing method for a breakdown of the time taken by
+        each point.
 
         """
         from datetime import timedelta, datetime
-        total = len(self) * (pad + estimate(**kwargs))
+        points = self.timing(pad=pad, velocity=velocity, **kwargs)
+        total = float(np.sum(points["move"]) + np.sum(points["count"]) +
+                      np.sum(points["overhead"]))
         # We can't test the time printing code since the result would
         # always change.
         if time:  # pragma: no cover
@@ -258,7 +478,7 @@ class SimpleScan(Scan):
     """SimpleScan is a scan along a single axis for a fixed set of values"""
     def __init__(self, action, values, defaults):
         self.action = action
-        self.values = values
+        self.values = freeze(values)
         self.name = action.title
         self.defaults = defaults
 
@@ -268,30 +488,33 @@ class SimpleScan(Scan):
 
         """
         return SimpleScan(self.action,
-                          map(func, self.values),
-                          self.name)
+                          [func(x) for x in self.values],
+                          self.defaults)
 
     @property
     def reverse(self):
         """Create a new scan that runs in the opposite direction"""
         return SimpleScan(self.action, self.values[::-1], self.defaults)
 
+    @cached
     def min(self):
         return self.values.min()
 
+    @cached
     def max(self):
         return self.values.max()
 
-    def __iter__(self):
-        for i in self.values:
-            self.action(i)
-            dic = OrderedDict()
-            dic[self.name] = self.action()
-            yield dic
+    def compile(self):
+        table = np.zeros(len(self.values),
+                         dtype=[(self.name, np.float64)])
+        table[self.name] = self.values
+        return ScanPlan([self.name], [self.action], table)
 
+    @cached
     def __len__(self):
         return len(self.values)
 
+    @cached
     def __repr__(self):
         return "SimpleScan({}, {}, {})".format(self.action.title.upper(),
                                                repr(self.values),
@@ -305,15 +528,14 @@ class SumScan(Scan):
         self.second = second
         self.defaults = self.first.defaults
 
-    def __iter__(self):
-        for i in self.first:
-            yield i
-        for i in self.second:
-            yield i
+    def compile(self):
+        return self.first.compile().then(self.second.compile())
 
+    @cached
     def __len__(self):
         return len(self.first) + len(self.second)
 
+    @cached
     def __repr__(self):
         return "{} + {}".format(self.first, self.second)
 
@@ -330,55 +552,91 @@ class SumScan(Scan):
         """Creates a new scan that runs in the opposite direction"""
         return SumScan(self.second.reverse, self.first.reverse)
 
+    @cached
     def min(self):
         return min(self.first.min(), self.second.min())
 
+    @cached
     def max(self):
         return max(self.first.max(), self.second.max())
 
 
 class ProductScan(Scan):
     """ProductScan performs every possible combination of the positions of
-    its two constituent scans."""
-    def __init__(self, outer, inner):
+    its two constituent scans.
+
+    If snake is true, the inner scan runs in reverse on every other
+    point of the outer scan, so that the inner axis does not need to
+    return to its starting position after each row."""
+    def __init__(self, outer, inner, snake=False):
         self.outer = outer
         self.inner = inner
+        self.snake = snake
         self.defaults = self.outer.defaults
 
-    def __iter__(self):
-        for i in self.outer:
-            for j in self.inner:
-                yield merge_dicts(i, j)
+    def compile(self):
+        if self.snake:
+            return self.outer.compile().product(
+                self.inner.compile(), self.inner.reverse.compile())
+        return self.outer.compile().product(self.inner.compile())
 
+    @cached
     def __len__(self):
         return len(self.outer) * len(self.inner)
 
+    @cached
     def __repr__(self):
+        if self.snake:
+            return "({} * {}).serpentine".format(self.outer, self.inner)
         return "{} * {}".format(self.outer, self.inner)
 
+    @property
+    def serpentine(self):
+        """
+        Create a copy of the scan which reverses the direction of the
+        inner scan on every other row.  This minimises the motor
+        movement of the inner axis.
+        """
+        return ProductScan(self.outer, self.inner, snake=True)
+
     def map(self, func):
         """The map function returns a modified scan that performs the given
         function on all of the original positions to return the new positions.
 
         """
         return ProductScan(self.outer.map(func),
-                           self.inner.map(func))
+                           self.inner.map(func),
+                           snake=self.snake)
 
     @property
     def reverse(self):
         """Creates a new scan that runs in the opposite direction"""
-        return ProductScan(self.outer.reverse, self.inner.reverse)
-
+        if self.snake and len(self.outer) % 2 == 0:
+            # The final row already runs the inner scan backwards
+            return ProductScan(self.outer.reverse, self.inner,
+                               snake=True)
+        return ProductScan(self.outer.reverse, self.inner.reverse,
+                           snake=self.snake)
+
+    @cached
     def min(self):
         return (self.outer.min(), self.inner.min())
 
+    @cached
     def max(self):
         return (self.outer.max(), self.inner.max())
 
+    # pylint: disable=too-many-arguments, too-many-locals
+    # pylint: disable=too-many-statements
     def plot(self, detector=None, save=None,
-             action=None, **kwargs):
+             action=None, pipeline=False, resume=None, combine=None,
+             until=None, **kwargs):
         """An overloading of Scan.plot to handle multidimensional
         scans."""
+        if isinstance(action, FitWorker):
+            raise TypeError("The fits of a two dimensional scan cannot be "
+                            "run in a separate process.  Leave out "
+                            "fit_process.")
         import warnings
         warnings.simplefilter("ignore", UserWarning)
 
@@ -389,63 +647,84 @@ class ProductScan(Scan):
         detector = self._normalise_detector(detector)
         axis = NBPlot()
 
-        xs = []
-        ys = []
+        xindex = PositionIndex(self.defaults.tolerance)
+        yindex = PositionIndex(self.defaults.tolerance)
+        xs = xindex.positions
+        ys = yindex.positions
 
         values = []
         for _ in range(len(self.outer)):
             values.append([np.nan] * len(self.inner))
 
-        action_remainder = None
+        plan = self.compile()
+        start = 0
+        if resume:
+            check_resume(plan, resume)
+            start = resume["point"]
+            for position in resume["state"][0]:
+                xindex.add(position)
+            for position in resume["state"][1]:
+                yindex.add(position)
+            values = resume["state"][2]
+
+        miny, minx = self.min()
+        maxy, maxx = self.max()
+        xlim = [1.05*minx - 0.05 * maxx, 1.05*maxx - 0.05 * minx]
+        ylim = [1.05*miny - 0.05 * maxy, 1.05*maxy - 0.05 * miny]
+
+        finished = threading.Event()
+        worker = None
         try:
-            with open(self.defaults.log_file(), "w") as logfile, \
+            with ScanLog(self.defaults.log_file(), start=start,
+                         plan=plan.fingerprint()) as log, \
                  detector(self, save) as detect:
-                for x in self:
-                    value = detect(**kwargs)
-
-                    keys = list(x.keys())
-                    keys[1] = keys[1]
-                    keys[0] = keys[0]
-                    y = x[keys[0]]
-                    x = x[keys[1]]
+                log.state = (xs, ys, values)
+
+                def record(keys, position, value):
+                    """Add a measured point to the log and the plot"""
+                    y = position[keys[0]]
+                    x = position[keys[1]]
                     if isinstance(value, float):
                         value = Average(value)
-                    if x not in xs:
-                        xs.append(x)
-                    if y not in ys:
-                        ys.append(y)
-                    if isinstance(values[ys.index(y)][xs.index(x)], Monoid):
-                        values[ys.index(y)][xs.index(x)] += value
+                    if combine:
+                        value = combine.zero().upgrade(value)
+                    row = yindex.add(y)
+                    column = xindex.add(x)
+                    if isinstance(values[row][column], Monoid):
+                        values[row][column] += value
                     else:
-                        values[ys.index(y)][xs.index(x)] = value
-                    logfile.write("{}\t{}\n".format(xs[-1], str(values[-1])))
+                        values[row][column] = value
+                    log.write(position, value)
                     axis.clear()
                     axis.set_xlabel(keys[1])
                     axis.set_ylabel(keys[0])
-                    miny, minx = self.min()
-                    maxy, maxx = self.max()
-                    rng = [1.05*minx - 0.05 * maxx,
-                           1.05*maxx - 0.05 * minx]
-                    axis.set_xlim(rng[0], rng[1])
-                    rng = [1.05*miny - 0.05 * maxy,
-                           1.05*maxy - 0.05 * miny]
-                    axis.set_ylim(rng[0], rng[1])
+                    axis.set_xlim(xlim[0], xlim[1])
+                    axis.set_ylim(ylim[0], ylim[1])
                     axis.pcolor(
                         self._estimate_locations(xs, len(self.inner),
                                                  minx, maxx),
                         self._estimate_locations(ys, len(self.outer),
                                                  miny, maxy),
-                        np.array([[float(z) for z in row]
-                                  for row in values]))
-                    if action:
-                        action_remainder = action(xs, values,
-                                                  axis)
+                        np.array([[float(z) for z in line]
+                                  for line in values]))
+                    result = action(xs, values, axis) if action else None
+                    if until and until(xs, values, result):
+                        finished.set()
+                    return result
+
+                with PointWorker(record, pipeline) as worker:
+                    for x in plan.skip(start):
+                        if finished.is_set():
+                            break
+                        worker(list(x.keys()), x, detect(**kwargs))
         except KeyboardInterrupt:
             pass
         if save:
             axis.savefig(save)
 
-        return action_remainder
+        if worker is None:
+            return None
+        return worker.result
 
     @staticmethod
     def _estimate_locations(xs, size, low, high):
@@ -470,13 +749,14 @@ class ParallelScan(Scan):
         self.second = second
         self.defaults = self.first.defaults
 
-    def __iter__(self):
-        for x, y in six.moves.zip(self.first, self.second):
-            yield merge_dicts(x, y)
+    def compile(self):
+        return self.first.compile().zip(self.second.compile())
 
+    @cached
     def __repr__(self):
         return "{} & {}".format(self.first, self.second)
 
+    @cached
     def __len__(self):
         return min(len(self.first), len(self.second))
 
@@ -493,9 +773,11 @@ class ParallelScan(Scan):
         """Creates a new scan that runs in the opposite direction"""
         return ParallelScan(self.first.reverse, self.second.reverse)
 
+    @cached
     def min(self):
         return (self.first.min(), self.second.min())
 
+    @cached
     def max(self):
         return (self.first.max(), self.second.max())
 
@@ -511,14 +793,16 @@ class ForeverScan(Scan):  # pragma: no cover
         self.scan = scan
         self.defaults = scan.defaults
 
-    def __iter__(self):
-        while True:
-            for x in self.scan:
-                yield x
+    def compile(self):
+        plan = self.scan.compile()
+        return ScanPlan(plan.names, plan.actions, plan.positions,
+                        forever=True)
 
+    @cached
     def __repr__(self):
         return "ForeverScan(" + repr(self.scan) + ")"
 
+    @cached
     def __len__(self):
         raise RuntimeError("Attempted to get the length of an infinite list")
 
@@ -529,8 +813,10 @@ class ForeverScan(Scan):  # pragma: no cover
     def reverse(self):
         return ForeverScan(self.scan.reverse)
 
+    @cached
     def min(self):
         return self.scan.min()
 
+    @cached
     def max(self):
         return self.scan.max()
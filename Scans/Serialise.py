@@ -0,0 +1,131 @@
+"""The Serialise module turns lists of monoids into compact binary
+buffers and back again.
+
+Every monoid type is stored with a fixed numpy dtype which holds one
+float for each of its components, with nested monoids flattened as in
+Monoid.components.  A buffer starts with a short versioned header that
+names the type of monoid, followed by one record for each element, so
+a whole list can be read back with a single call to numpy.
+
+"""
+import json
+import struct
+from collections import OrderedDict
+import numpy as np
+from .Monoid import (Average, Sum, StdDev, Polarisation, WeightedMean,
+                     MonoidList, ListOfMonoids)
+from .Arrays import MonoidArray
+
+#: The first bytes of every encoded buffer
+MAGIC = b"MNDS"
+#: The newest version of the encoding
+VERSION = 1
+#: The monoids which can be encoded, by name
+KINDS = OrderedDict((kind.__name__, kind) for kind in (
+    Average, Sum, StdDev, Polarisation, WeightedMean, MonoidList))
+
+# The magic bytes, the version, and the length of the description
+_HEADER = struct.Struct("<4sBI")
+
+
+def _name(kind):
+    """Find the name under which a type of monoid is encoded"""
+    if issubclass(kind, MonoidList):
+        return "MonoidList"
+    if kind.__name__ not in KINDS:
+        raise TypeError("Cannot encode monoids of type {}".format(
+            kind.__name__))
+    return kind.__name__
+
+
+def dtype(monoid):
+    """
+    Get the record type used to encode a monoid.
+
+    Parameters
+    ----------
+    monoid : Monoid
+      An example of the type of monoid to encode
+
+    Returns
+    -------
+    A numpy dtype with a little endian float for each component of
+    the monoid.
+    """
+    return np.dtype([(str(name), "<f8") for name in monoid.components()])
+
+
+def encode(monoids):
+    """
+    Encode a list of monoids of the same type into bytes.
+
+    Parameters
+    ----------
+    monoids : list of Monoid
+      The monoids to encode.  A MonoidArray is encoded directly from
+      its arrays.
+
+    Returns
+    -------
+    The encoded bytes
+    """
+    if not isinstance(monoids, MonoidArray):
+        monoids = MonoidArray(monoids)
+    description = {"fields": [], "type": None, "channels": None}
+    if len(monoids):
+        description["type"] = _name(monoids.kind)
+        if monoids.channels is not None:
+            description["channels"] = [_name(kind)
+                                       for kind in monoids.channels]
+    columns = monoids.columns()
+    description["fields"] = list(columns)
+    records = np.zeros(len(monoids),
+                       dtype=[(str(name), "<f8") for name in columns])
+    for name, column in columns.items():
+        records[name] = column
+    header = json.dumps(description).encode("utf-8")
+    return _HEADER.pack(MAGIC, VERSION, len(header)) + header + \
+        records.tobytes()
+
+
+def decode(buffer, container=ListOfMonoids):
+    """
+    Decode the bytes made by encode.
+
+    Parameters
+    ----------
+    buffer : bytes
+      The encoded monoids
+    container : type
+      The type of list to return.  MonoidArray avoids building a
+      separate object for each monoid.
+
+    Returns
+    -------
+    The list of monoids
+    """
+    magic, version, size = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("The buffer does not hold encoded monoids")
+    if version > VERSION:
+        raise ValueError(
+            "Monoids were encoded with version {}, but only versions up "
+            "to {} can be read".format(version, VERSION))
+    start = _HEADER.size + size
+    description = json.loads(bytes(buffer[_HEADER.size:start])
+                             .decode("utf-8"))
+    if description["type"] is None:
+        return container()
+    fields = [str(name) for name in description["fields"]]
+    records = np.frombuffer(buffer, offset=start,
+                            dtype=[(name, "<f8") for name in fields])
+    channels = description["channels"]
+    if channels is not None:
+        channels = [KINDS[name] for name in channels]
+    result = MonoidArray.from_columns(
+        KINDS[description["type"]],
+        OrderedDict((name, records[name]) for name in fields),
+        channels)
+    if container is MonoidArray:
+        return result
+    return container(result)
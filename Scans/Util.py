@@ -5,6 +5,7 @@ module should ever need to be called by the end user.
 """
 import numpy as np
 from .Scans import SimpleScan
+from .Adaptive import AdaptiveScan
 from .Motion import Motion, BlockMotion
 
 TIME_KEYS = ["frames", "uamps", "seconds", "minutes", "hours"]
@@ -181,6 +182,18 @@ def make_scan(defaults):
         stride
           The approximate step size.  The scan may shrink this step size
           to ensure that the final point is still included in the scan.
+        target
+          A dictionary of the largest acceptable uncertainty on each
+          parameter of the fit.  If given, the scan only measures the
+          points it needs to reach this precision.
+        precision
+          A dictionary of the largest acceptable uncertainty on each
+          parameter of the fit.  If given, the points are measured in
+          order, but the scan stops once the fit is this precise.
+        bootstrap
+          The number of noisy copies of the data to refit once the
+          scan is complete.  If given, the 95% confidence interval on
+          each parameter of the fit is returned under "intervals".
 
         Returns
         -------
@@ -197,11 +210,9 @@ def make_scan(defaults):
         if frames:
             kwargs["frames"] = frames
 
-        if isinstance(motion, Motion):
-            pass
-        elif isinstance(motion, str):
+        if isinstance(motion, str):
             motion = BlockMotion(motion)
-        else:
+        elif not isinstance(motion, Motion):
             raise TypeError(
                 "Cannot run scan on axis {}. Try a string or a motion "
                 "object instead.  It's also possible that you may "
@@ -213,7 +224,15 @@ def make_scan(defaults):
         for point in points:
             motion.require(point)
 
-        scn = SimpleScan(motion, points, defaults)
+        if "target" in kwargs:
+            if "fit" not in kwargs:
+                raise TypeError(
+                    "An adaptive scan needs a fit to judge the target. "
+                    "Try passing fit=GaussianFit() as well.")
+            scn = AdaptiveScan(motion, points, defaults, kwargs["fit"],
+                               kwargs.pop("target"))
+        else:
+            scn = SimpleScan(motion, points, defaults)
         if any([x in kwargs for x in
                 TIME_KEYS]):
             if "fit" in kwargs:
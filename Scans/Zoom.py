@@ -44,7 +44,7 @@ class Zoom(Defaults):
     def log_file():
         from datetime import datetime
         now = datetime.now()
-        return "U:/zoom_scan_{}_{}_{}_{}_{}_{}.dat".format(
+        return "U:/zoom_scan_{}_{}_{}_{}_{}_{}.npz".format(
             now.year, now.month, now.day, now.hour, now.minute, now.second)
 
     def __repr__(self):
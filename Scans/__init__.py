@@ -11,12 +11,13 @@ from __future__ import absolute_import
 from socket import gethostname
 from multiprocessing import current_process
 from .Fit import *  # noqa: F403,F401
-from . import Fit
+from .Estimate import *  # noqa: F403,F401
+from . import Fit, Estimate
 from .Motion import populate
 
 host = gethostname().upper()
 
-_all = Fit.__all__[:]
+_all = Fit.__all__ + Estimate.__all__
 
 # pylint: disable=not-callable
 if current_process().name == "MainProcess":
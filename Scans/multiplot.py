@@ -5,7 +5,7 @@ from multiprocessing import Process, Pipe
 import sys
 import threading
 
-import matplotlib.pyplot as plt
+import numpy as np
 
 # IBEX doesn't report a proper path for sys.executable
 # This breaks multiprocessing, since it doesn't know
@@ -15,6 +15,7 @@ if sys.executable == '':
 
 
 # Use a no cover pragma since coverage can't see the other process
+# pylint: disable=too-many-instance-attributes
 class ProcessPlotter(object):  # pragma: no cover
     """
     This object maintains a separate a separate process at the OS level
@@ -30,6 +31,13 @@ class ProcessPlotter(object):  # pragma: no cover
       is added.  Otherwise, the plot will remain where the user left
       it, but the home functionality will not be updated after the user
       moves the graph.
+
+    Along with the methods of the matplotlib axis and figure, the
+    plotter understands two incremental commands.  The ``series``
+    command adds or replaces a single point in a named errorbar plot
+    and the ``curve`` command replaces the data of a named line.  Both
+    update the existing artists in place, so that only the changed
+    data needs to be sent down the pipe.
     """
     def __init__(self, rehome=False):
         self.x = []
@@ -41,6 +49,77 @@ class ProcessPlotter(object):  # pragma: no cover
         self.rehome = rehome
 
         self._colorbar = None
+        self._series = {}
+        self._curves = {}
+        self._limits = [np.inf, -np.inf]
+
+    def _reset(self):
+        """Forget the incremental artists after the axis is cleared"""
+        self._series = {}
+        self._curves = {}
+        self._limits = [np.inf, -np.inf]
+
+    def series(self, name, index, x, y, err, **kwargs):
+        """
+        Set a single point in a named errorbar plot.  If the index is
+        past the end of the series, the point is appended.  The keyword
+        arguments style the plot when the series is first created.
+        """
+        if name not in self._series:
+            container = self.axis.errorbar([], [], yerr=[], capsize=0,
+                                           **kwargs)
+            self._series[name] = ([], [], [], [], container)
+        xs, ys, errs, segments, container = self._series[name]
+        segment = [(x, y - err), (x, y + err)]
+        if index < len(xs):
+            xs[index] = x
+            ys[index] = y
+            errs[index] = err
+            segments[index] = segment
+        else:
+            xs.append(x)
+            ys.append(y)
+            errs.append(err)
+            segments.append(segment)
+        line, _, bars = container.lines
+        line.set_data(xs, ys)
+        for errorbar in bars:
+            errorbar.set_segments(segments)
+        # The range only ever grows, so that a new point does not need
+        # every other point to be checked again
+        if not np.isnan(y - err):
+            self._limits[0] = min(self._limits[0], y - err)
+        if not np.isnan(y + err):
+            self._limits[1] = max(self._limits[1], y + err)
+
+    def curve(self, name, x, y, *args, **kwargs):
+        """
+        Replace the data of a named line, creating it if needed.
+        """
+        if name in self._curves:
+            self._curves[name].set_data(x, y)
+            if "label" in kwargs:
+                self._curves[name].set_label(kwargs["label"])
+        else:
+            self._curves[name] = self.axis.plot(x, y, *args, **kwargs)[0]
+
+    def _rescale(self):
+        """Fit the vertical range of the axis around the errorbar series"""
+        low, high = self._limits
+        if not np.isfinite(low) or not np.isfinite(high):
+            return
+        diff = high - low
+        if diff == 0:
+            diff = 1
+        self.axis.set_ylim(low - 0.05 * diff, high + 0.05 * diff)
+
+    def _pcolor(self, *args, **kwargs):
+        """Draw a colour map, replacing the colour bar of the last one"""
+        temp = self.axis.pcolor(*args, **kwargs)
+        if self._colorbar:
+            self._colorbar.remove()
+        import matplotlib.pyplot as plt
+        self._colorbar = plt.colorbar(temp)
 
     def poll_draw(self):
         """
@@ -48,6 +127,7 @@ class ProcessPlotter(object):  # pragma: no cover
         off the process channel
         """
 
+        changed = False
         while True:
             if not (self.pipe and self.pipe.poll()):
                 break
@@ -60,19 +140,27 @@ class ProcessPlotter(object):  # pragma: no cover
                 return None
 
             if isinstance(command, tuple):
+                if command[0] in ("series", "curve"):
+                    getattr(self, command[0])(*command[1], **command[2])
+                    changed = changed or command[0] == "series"
+                    continue
+                if changed:
+                    self._rescale()
+                    changed = False
+                if command[0] in ("clf", "cla", "clear"):
+                    self._reset()
                 if command[0] == "clf":
                     self.axis.cla()
                     continue
                 elif command[0] == "pcolor":
-                    temp = self.axis.pcolor(*command[1], **command[2])
-                    if self._colorbar:
-                        self._colorbar.remove()
-                    self._colorbar = plt.colorbar(temp)
+                    self._pcolor(*command[1], **command[2])
                 if hasattr(self.axis, command[0]):
                     getattr(self.axis, command[0])(*command[1], **command[2])
                 elif hasattr(self.fig, command[0]):
                     getattr(self.fig, command[0])(*command[1], **command[2])
 
+        if changed:
+            self._rescale()
         self.fig.canvas.draw()
         self.fig.canvas.show()
         threading.Timer(0.5, self.poll_draw).start()
@@ -82,6 +170,7 @@ class ProcessPlotter(object):  # pragma: no cover
 
         self.pipe = pipe
 
+        import matplotlib.pyplot as plt
         threading.Timer(0.5, self.poll_draw).start()
         self.fig, self.axis = plt.subplots()
         plt.show()
@@ -90,9 +179,10 @@ class ProcessPlotter(object):  # pragma: no cover
 class NBPlot(object):
     """
     A non-blocking plot to get around the threading limitations of
-    matplotlib.
+    matplotlib.  Commands may be sent from several threads at once.
     """
     def __init__(self, **kwargs):
+        self._lock = threading.Lock()
         self.plot_pipe, plotter_pipe = Pipe()
         self.plotter = ProcessPlotter(**kwargs)
         self.plot_process = Process(target=self.plotter,
@@ -101,13 +191,15 @@ class NBPlot(object):
         self.plot_process.start()
 
     def __call__(self, data):
-        self.plot_pipe.send(data)
+        with self._lock:
+            self.plot_pipe.send(data)
 
     def join(self):
         """Close the plot and get the results from it"""
 
-        self.plot_pipe.send(None)
-        result = self.plot_pipe.recv()
+        with self._lock:
+            self.plot_pipe.send(None)
+            result = self.plot_pipe.recv()
         self.plot_pipe.close()
         return result
 
@@ -116,7 +208,8 @@ class NBPlot(object):
             """
             Send the appropriate command to the separate matplotlib process
             """
-            self.plot_pipe.send((name, args, kwargs))
+            with self._lock:
+                self.plot_pipe.send((name, args, kwargs))
         return wrapper
 
     def __del__(self):
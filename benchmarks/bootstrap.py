@@ -0,0 +1,94 @@
+"""
+Time the Monte-Carlo confidence intervals on a fit, resampling in a
+single process and in a pool of processes.  The pool is started with
+each of the start methods that python offers, since a spawned process
+must import Scans and numpy again before it can fit anything.  The
+intervals must be ready before the motors reach the next position of
+an alignment.  The pool is kept between resamplings, so the benchmark
+reports the first resampling, which starts the pool, apart from the
+fastest of the ones after it.
+
+Run it from the root of the repository with
+
+    python benchmarks/bootstrap.py
+
+"""
+from __future__ import print_function
+if __name__ == '__main__' and __package__ is None:
+    from os import sys, path
+    sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import multiprocessing
+import timeit
+from functools import partial
+import numpy as np
+from Scans.Fit import Gaussian, Erf, Linear, PeakFit, close_pools
+from Scans.Monoid import Average
+from Scans.Arrays import MonoidArray
+
+POINTS = 41
+NOISE = 0.05
+SAMPLES = 200
+
+#: The number of processes in the pool
+POOL = max(2, multiprocessing.cpu_count())
+
+#: The models to fit, with the parameters of the simulated data
+MODELS = [(Gaussian, [1.0, 0.3, 5.0, 1.0]),
+          (Erf, [1.0, 3.0, 2.0, 1.0]),
+          (Linear, [2.0, 1.0]),
+          (PeakFit(0.5), [1.0, -1.0, 2.0, 2.0])]
+
+
+def start_methods():
+    """The ways of starting a pool which this python offers"""
+    try:
+        offered = multiprocessing.get_all_start_methods()
+    except AttributeError:  # Python 2 can only fork
+        return [None]
+    return [method for method in ("fork", "spawn") if method in offered]
+
+
+def measure(model, truth, random):
+    """Simulate a scan, with an uncertainty on each point"""
+    x = np.linspace(0, 2, POINTS)
+    y = model.get_y(x, truth) + NOISE * random.randn(POINTS)
+    return x, MonoidArray([Average(value / NOISE**2, count=1 / NOISE**2)
+                           for value in y])
+
+
+def times(model, x, y, params, processes):
+    """The first of several resamplings and the fastest of the rest"""
+    close_pools()
+    runs = timeit.repeat(
+        partial(model.resample, x, y, params, SAMPLES, processes),
+        number=1, repeat=4)
+    return 1e3 * runs[0], 1e3 * min(runs[1:])
+
+
+def main():
+    """Resample each fit in this process and in a pool"""
+    random = np.random.RandomState(0)
+    data = []
+    for model, truth in MODELS:
+        x, y = measure(model, truth, random)
+        data.append((model, x, y, model.fit(x, np.array(y.values()))))
+
+    row = "{:>12} {:>8} {:>9} {:>10.1f} {:>10.1f}"
+    print("{:>12} {:>8} {:>9} {:>10} {:>10}".format(
+        "model", "start", "processes", "first ms", "after ms"))
+    for model, x, y, params in data:
+        print(row.format(type(model).__name__, "-", 1,
+                         *times(model, x, y, params, 1)))
+    for method in start_methods():
+        if method is not None:
+            multiprocessing.set_start_method(method, force=True)
+        for model, x, y, params in data:
+            print(row.format(type(model).__name__, method or "fork", POOL,
+                             *times(model, x, y, params, POOL)))
+    close_pools()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare fitting the CurveFit models with their analytic jacobians
+against estimating the jacobian by finite differences.  For each model,
+the benchmark reports the number of model and jacobian evaluations and
+the time taken for a single fit.
+
+Run it from the root of the repository with
+
+    python benchmarks/curve_fit.py
+
+"""
+from __future__ import print_function
+if __name__ == '__main__' and __package__ is None:
+    from os import sys, path
+    sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import copy
+import timeit
+from collections import Counter
+from functools import partial
+import numpy as np
+from Scans.Fit import Gaussian, Erf, DampedOscillator
+
+POINTS = 41
+NOISE = 0.02
+REPEAT = 50
+
+#: The models to fit, with the parameters of the simulated data
+MODELS = [(Gaussian, [1.0, 0.5, 5.0, 1.0]),
+          (Erf, [1.0, 3.0, 2.0, 1.0]),
+          (DampedOscillator, [1.0, 2.0, 6.0, 1.5])]
+
+
+def counted(func, counts, key):
+    """Wrap a function to count how often it is called"""
+    def wrapper(*args):
+        """Count the call and pass it on"""
+        counts[key] += 1
+        return func(*args)
+    return wrapper
+
+
+def variants(model):
+    """Make copies of a model with and without its analytic jacobian,
+    which count their evaluations."""
+    result = []
+    for name, analytic in (("finite", False), ("analytic", True)):
+        counts = Counter()
+        fitter = copy.copy(model)
+        fitter._model = counted(type(model)._model, counts, "model")
+        if analytic:
+            fitter._jacobian = counted(type(model)._jacobian, counts,
+                                       "jacobian")
+        else:
+            fitter._jacobian = None
+        result.append((name, fitter, counts))
+    return result
+
+
+def main():
+    """Fit each model both ways and report the cost of a fit"""
+    random = np.random.RandomState(0)
+    x = np.linspace(0, 2, POINTS)
+    print("{:>20} {:>9} {:>6} {:>9} {:>8}".format(
+        "model", "jacobian", "calls", "jacobians", "ms/fit"))
+    for model, truth in MODELS:
+        y = model.get_y(x, truth) + NOISE * random.randn(POINTS)
+        for name, fitter, counts in variants(model):
+            params = fitter.fit(x, y)
+            assert np.allclose(model.get_y(x, params), model.get_y(x, truth),
+                               atol=5 * NOISE), params
+            calls = dict(counts)
+            best = min(timeit.repeat(partial(fitter.fit, x, y),
+                                     number=REPEAT, repeat=3))
+            print("{:>20} {:>9} {:>6} {:>9} {:>8.3f}".format(
+                type(model).__name__, name, calls.get("model", 0),
+                calls.get("jacobian", 0), 1e3 * best / REPEAT))
+
+
+if __name__ == '__main__':
+    main()
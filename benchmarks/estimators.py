@@ -0,0 +1,51 @@
+"""
+Compare the closed form estimates of a peak and an edge against the
+full fits of the same data.  For each method, the benchmark reports
+the time taken and how far the estimated center is from the truth.
+
+Run it from the root of the repository with
+
+    python benchmarks/estimators.py
+
+"""
+from __future__ import print_function
+if __name__ == '__main__' and __package__ is None:
+    from os import sys, path
+    sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import timeit
+from functools import partial
+import numpy as np
+from Scans.Fit import Gaussian, Erf, PeakFit
+from Scans.Estimate import Caruana, Centroid, FWHM, Edge
+
+POINTS = 41
+NOISE = 0.05
+REPEAT = 50
+
+#: The shape of the simulated data, with the methods which measure it
+SHAPES = [(Gaussian, [1.0, 0.3, 5.0, 1.0],
+           [Gaussian, PeakFit(0.5), Caruana, Centroid, FWHM]),
+          (Erf, [1.0, 3.0, 2.0, 1.0], [Erf, Edge])]
+
+
+def main():
+    """Measure each shape by every method and report the cost"""
+    random = np.random.RandomState(0)
+    x = np.linspace(0, 2, POINTS)
+    print("{:>20} {:>8} {:>10}".format("method", "ms/fit", "center"))
+    for shape, truth, methods in SHAPES:
+        y = shape.get_y(x, truth) + NOISE * random.randn(POINTS)
+        for method in methods:
+            center = method.readable(method.fit(x, y))
+            center = center.get("center", center.get("peak"))
+            best = min(timeit.repeat(partial(method.fit, x, y),
+                                     number=REPEAT, repeat=3))
+            print("{:>20} {:>8.3f} {:>+10.4f}".format(
+                type(method).__name__, 1e3 * best / REPEAT,
+                center - truth[0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare fitting every channel of a detector in a single batch against
+fitting the channels one at a time, as the live fit does after every
+point of a scan.
+
+Run it from the root of the repository with
+
+    python benchmarks/fit_channels.py
+
+"""
+from __future__ import print_function
+if __name__ == '__main__' and __package__ is None:
+    from os import sys, path
+    sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import timeit
+from functools import partial
+import numpy as np
+from Scans.Fit import Fit, Gaussian, Erf, Linear, PeakFit
+
+POINTS = 41
+NOISE = 0.02
+REPEAT = 20
+CHANNELS = (1, 4, 16)
+
+#: The models to fit, with the parameters of the simulated data
+MODELS = [(Gaussian, [1.0, 0.5, 5.0, 1.0]),
+          (Erf, [1.0, 3.0, 2.0, 1.0]),
+          (Linear, [2.0, 1.0]),
+          (PeakFit(0.5), [1.0, -1.0, 2.0, 2.0])]
+
+
+def channels(model, truth, count, random):
+    """Simulate a detector whose channels differ slightly"""
+    x = np.linspace(0, 2, POINTS)
+    ys = [model.get_y(x, np.multiply(truth, 1 + 0.05 * random.randn(
+        len(truth)))) + NOISE * random.randn(POINTS) for _ in range(count)]
+    return x, np.array(ys)
+
+
+def main():
+    """Time both ways of fitting for a growing number of channels"""
+    random = np.random.RandomState(0)
+    print("{:>12} {:>8} {:>10} {:>10}".format(
+        "model", "channels", "batch ms", "loop ms"))
+    for model, truth in MODELS:
+        for count in CHANNELS:
+            x, ys = channels(model, truth, count, random)
+            times = []
+            for func in (model.fit_many, partial(Fit.fit_many, model)):
+                times.append(min(timeit.repeat(partial(func, x, ys),
+                                               number=REPEAT, repeat=3)))
+            print("{:>12} {:>8} {:>10.3f} {:>10.3f}".format(
+                type(model).__name__, count,
+                1e3 * times[0] / REPEAT, 1e3 * times[1] / REPEAT))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure how long it takes to import Scans in a fresh interpreter, as
+a console session or a batch job does every time it starts.  Python
+reports the time spent on each module with ``-X importtime``, so the
+benchmark reports the slowest of the modules imported and checks
+that the heavy plotting and fitting libraries are left until they
+are needed.
+
+Run it from the root of the repository with
+
+    python benchmarks/import_time.py
+
+"""
+from __future__ import print_function
+from os import path
+import subprocess
+import sys
+
+REPEAT = 5
+SHOWN = 10
+
+#: Libraries which should not be imported until they are used
+DEFERRED = ["scipy", "matplotlib"]
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+SCRIPT = """
+import sys
+import Scans
+print(" ".join(name for name in {} if name in sys.modules))
+""".format(DEFERRED)
+
+
+def measure():
+    """Import Scans in a new interpreter and return the cumulative
+    microseconds spent on each module, along with the deferred
+    libraries that were imported anyway."""
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    out, err = process.communicate()
+    if process.returncode:
+        raise RuntimeError(err)
+    times = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times, out.split()
+
+
+def main():
+    """Report the fastest of several imports"""
+    runs = [measure() for _ in range(REPEAT)]
+    times, loaded = min(runs, key=lambda run: run[0]["Scans"])
+    print("import Scans: {:.1f} ms".format(times["Scans"] / 1e3))
+    print("{:>40} {:>8}".format("module", "ms"))
+    for name in sorted(times, key=times.get, reverse=True)[1:SHOWN + 1]:
+        print("{:>40} {:>8.1f}".format(name, times[name] / 1e3))
+    if loaded:
+        print("Imported too early: {}".format(", ".join(loaded)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Measure the cost of accumulating monoids in the pattern used by
+pol_measure, where a polarisation for each time slice is summed over
+the detector channels.
+
+Run it from the root of the repository with
+
+    python benchmarks/monoid_add.py
+
+"""
+from __future__ import print_function
+if __name__ == '__main__' and __package__ is None:
+    from os import sys, path
+    sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import timeit
+from functools import partial
+from Scans.Monoid import Average, Polarisation
+
+SLICES = 4
+CHANNELS = 2
+REPEAT = 2000
+
+
+def measurement():
+    """The polarisations for a single channel, as in pol_measure"""
+    return [Polarisation(Average(1000.0, 20.0), Average(400.0, 20.0))
+            for _ in range(SLICES)]
+
+
+def copying(measurements):
+    """Accumulate with +, which builds a new monoid for every add"""
+    pols = [Polarisation.zero() for _ in range(SLICES)]
+    for measured in measurements:
+        for idx, pol in enumerate(measured):
+            pols[idx] = pols[idx] + pol
+    return pols
+
+
+def in_place(measurements):
+    """Accumulate with +=, which updates the totals in place"""
+    pols = [Polarisation.zero() for _ in range(SLICES)]
+    for measured in measurements:
+        for idx, pol in enumerate(measured):
+            pols[idx] += pol
+    return pols
+
+
+def main():
+    """Time both accumulation methods and report the cost of each add"""
+    measurements = [measurement() for _ in range(CHANNELS * REPEAT)]
+    adds = len(measurements) * SLICES
+    assert [float(x) for x in copying(measurements)] == \
+        [float(x) for x in in_place(measurements)]
+    for func in (copying, in_place):
+        best = min(timeit.repeat(partial(func, measurements),
+                                 number=1, repeat=5))
+        cost = 1e6 * best / adds
+        print("{:>10}: {:.3f} us per add".format(func.__name__, cost))
+
+
+if __name__ == '__main__':
+    main()